@@ -3,14 +3,25 @@ API client for testing the backend endpoints
 """
 import httpx
 import asyncio
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 
 class TelegramRAGClient:
     """Client for interacting with the Telegram RAG API"""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        limits: Optional[httpx.Limits] = None,
+        timeout: Optional[httpx.Timeout] = None
+    ):
+        """limits and timeout default to httpx's own (100 connections, 5s)"""
         self.base_url = base_url
-        self.client = httpx.AsyncClient()
+        options = {}
+        if limits is not None:
+            options["limits"] = limits
+        if timeout is not None:
+            options["timeout"] = timeout
+        self.client = httpx.AsyncClient(**options)
     
     async def health_check(self) -> Dict[str, Any]:
         """Check API health"""
@@ -57,10 +68,18 @@ class TelegramRAGClient:
         response = await self.client.get(f"{self.base_url}/api/knowledge/sources")
         return response.json()
     
-    async def simulate_telegram_message(self, user_id: int, chat_id: int, text: str) -> Dict[str, Any]:
+    async def get_recent_conversations(self, limit: int = 100, before: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get a page of the recent conversations feed and the cursor for the next one"""
+        params = {"limit": limit}
+        if before:
+            params["before"] = before
+        response = await self.client.get(f"{self.base_url}/api/dashboard/conversations", params=params)
+        return response.json(), response.headers.get("X-Next-Cursor")
+    
+    async def simulate_telegram_message(self, user_id: int, chat_id: int, text: str, update_id: int = 123456) -> Dict[str, Any]:
         """Simulate a Telegram message"""
         payload = {
-            "update_id": 123456,
+            "update_id": update_id,
             "message": {
                 "message_id": 1,
                 "from": {"id": user_id, "first_name": "Test", "username": "testuser"},
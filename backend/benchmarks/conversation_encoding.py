@@ -0,0 +1,111 @@
+"""
+Benchmark size and speed of the stored conversation history encodings
+
+Compares the legacy JSON entries with the versioned msgpack encoding (with and
+without zlib for long turns): bytes per conversation, encode/decode time per
+turn and, with --redis, the MEMORY USAGE Redis reports for a stored
+conversation.
+
+Usage (from the backend directory):
+    python -m benchmarks.conversation_encoding --conversations 1000
+    python -m benchmarks.conversation_encoding --redis
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from services.conversation_codec import ConversationCodec
+from utils.config import settings
+
+WORDS = (
+    "the bot answers questions about products orders delivery returns payment "
+    "account warranty support price discount store opening hours contact"
+).split()
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def build_conversations(count: int, seed: int = 42) -> List[List[Dict[str, Any]]]:
+    """Synthetic conversations with short questions and longer replies"""
+    rng = random.Random(seed)
+    conversations = []
+    for _ in range(count):
+        turns = []
+        for i in range(settings.MAX_CONVERSATION_HISTORY):
+            role = "user" if i % 2 == 0 else "assistant"
+            length = rng.randint(5, 25) if role == "user" else rng.randint(40, 250)
+            turns.append({
+                "role": role,
+                "content": _text(rng, length),
+                "timestamp": int(time.time()) - rng.randint(0, 86400)
+            })
+        conversations.append(turns)
+    return conversations
+
+CODECS = {
+    "json": ConversationCodec(encoding="json"),
+    "msgpack": ConversationCodec(encoding="msgpack", compress_threshold=1 << 30),
+    "msgpack+zlib": ConversationCodec(encoding="msgpack", compress_threshold=settings.CONVERSATION_COMPRESS_THRESHOLD)
+}
+
+def run_case(name: str, codec: ConversationCodec, conversations: List[List[Dict[str, Any]]]):
+    turns = [turn for conversation in conversations for turn in conversation]
+
+    started = time.perf_counter()
+    encoded = [codec.encode(turn) for turn in turns]
+    encode_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for entry in encoded:
+        codec.decode(entry)
+    decode_time = time.perf_counter() - started
+
+    total_bytes = sum(len(entry) for entry in encoded)
+    print(
+        f"{name:<13} bytes/conversation: {total_bytes / len(conversations):8.1f}   "
+        f"encode: {encode_time / len(turns) * 1e6:6.2f} us/turn   "
+        f"decode: {decode_time / len(turns) * 1e6:6.2f} us/turn"
+    )
+
+async def redis_memory(conversations: List[List[Dict[str, Any]]], sample: int):
+    """Store a sample of conversations per encoding and report MEMORY USAGE"""
+    from services.redis_client import get_raw_redis_client
+
+    client = await get_raw_redis_client()
+    for name, codec in CODECS.items():
+        keys = []
+        try:
+            pipe = client.pipeline(transaction=False)
+            for i, conversation in enumerate(conversations[:sample]):
+                key = f"conversation:bench:encoding:{name}:{i}"
+                keys.append(key)
+                pipe.rpush(key, *[codec.encode(turn) for turn in conversation])
+            await pipe.execute()
+
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.memory_usage(key)
+            usage = [value or 0 for value in await pipe.execute()]
+            print(f"{name:<13} redis memory/conversation: {sum(usage) / len(usage):8.1f} bytes")
+        finally:
+            if keys:
+                await client.delete(*keys)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--redis", action="store_true", help="also measure MEMORY USAGE in Redis")
+    parser.add_argument("--redis-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    conversations = build_conversations(args.conversations)
+    for name, codec in CODECS.items():
+        run_case(name, codec, conversations)
+
+    if args.redis:
+        asyncio.run(redis_memory(conversations, args.redis_sample))
+
+if __name__ == "__main__":
+    main()
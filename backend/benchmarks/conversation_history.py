@@ -0,0 +1,114 @@
+"""
+Benchmark Redis round trips and latency of conversation history updates
+
+Compares the per-message history traffic of the original command-by-command
+implementation (LRANGE, then LPUSH/LTRIM/EXPIRE for each turn) with the
+pipelined ConversationManager operations the live pipeline uses.
+
+Runs in its own, empty Redis database (--db), which it flushes afterwards, so
+the usage counters written alongside each turn never reach the dashboard.
+
+Usage (from the backend directory, against the Redis in .env):
+    python -m benchmarks.conversation_history --messages 1000 --db 15
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, List
+
+from services.redis_client import get_redis_client, get_raw_redis_client, conversation_manager
+from utils.config import settings
+
+class RoundTripCounter:
+    """Count network round trips issued through a Redis client"""
+
+    def __init__(self, *clients):
+        self.count = 0
+        for client in clients:
+            self._wrap(client)
+
+    def _wrap(self, client):
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+        counter = self
+
+        async def counted_execute_command(*args, **kwargs):
+            counter.count += 1
+            return await execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+
+            async def counted_execute(*e_args, **e_kwargs):
+                counter.count += 1
+                return await execute(*e_args, **e_kwargs)
+
+            pipe.execute = counted_execute
+            return pipe
+
+        client.execute_command = counted_execute_command
+        client.pipeline = counted_pipeline
+
+def _turn(role: str, content: str) -> Dict[str, Any]:
+    return {"role": role, "content": content, "timestamp": int(time.time())}
+
+async def legacy_message(client, user_id: str, text: str, reply: str) -> List[Dict[str, Any]]:
+    """History traffic of the original process_message, one command per await"""
+    key = f"conversation:{user_id}"
+    history = await client.lrange(key, 0, settings.MAX_CONVERSATION_HISTORY - 1)
+    for message in (_turn("user", text), _turn("assistant", reply)):
+        await client.lpush(key, json.dumps(message))
+        await client.ltrim(key, 0, settings.MAX_CONVERSATION_HISTORY - 1)
+        await client.expire(key, conversation_manager.ttl)
+    return [json.loads(msg) for msg in history]
+
+async def pipelined_message(client, user_id: str, text: str, reply: str) -> List[Dict[str, Any]]:
+    """History traffic of the current process_message: recent turns and summary, then the reply"""
+    history, _ = await conversation_manager.get_memory_and_append(user_id, _turn("user", text))
+    await conversation_manager.add_message(user_id, _turn("assistant", reply))
+    return history
+
+async def run_case(name: str, handler, client, counter: RoundTripCounter, messages: int, users: int):
+    reply = "This is a representative assistant reply. " * 10
+    latencies = []
+    counter.count = 0
+    for i in range(messages):
+        user_id = f"bench:{name}:{i % users}"
+        started = time.perf_counter()
+        await handler(client, user_id, f"Question number {i}", reply)
+        latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    print(
+        f"{name:<10} round trips/message: {counter.count / messages:5.2f}   "
+        f"mean: {sum(latencies) / messages * 1000:7.3f} ms   "
+        f"p95: {latencies[int(messages * 0.95) - 1] * 1000:7.3f} ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--db", type=int, default=15, help="empty Redis database to run in, flushed afterwards")
+    args = parser.parse_args()
+
+    if args.db == settings.REDIS_DB:
+        parser.error(f"--db must differ from the app's REDIS_DB ({settings.REDIS_DB})")
+    # Read when the first client creates its pool
+    settings.REDIS_DB = args.db
+
+    client = await get_redis_client()
+    if await client.dbsize():
+        parser.error(f"Redis database {args.db} is not empty")
+    # Conversation history goes through the bytes client, count both
+    counter = RoundTripCounter(client, await get_raw_redis_client())
+    try:
+        await run_case("legacy", legacy_message, client, counter, args.messages, args.users)
+        await run_case("pipelined", pipelined_message, client, counter, args.messages, args.users)
+    finally:
+        await client.flushdb()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,140 @@
+"""
+Replay a captured query log against a deployment
+
+Reads the sampled query log (QUERY_LOG_MODE=file or redis) and re-sends each
+query through the target's Telegram webhook at its original pacing, or faster
+with --speed. Every logged user is mapped to one synthetic Telegram id, so
+per-user ordering is preserved, and every message gets a fresh update_id so it
+is not deduplicated.
+
+Reports webhook throughput, acceptance latency percentiles and outcomes, then
+reads the target's conversations feed for the end-to-end processing latency
+of the replayed messages. Replies go to the synthetic chat ids, so point the
+target at a test bot.
+
+Usage (from the backend directory):
+    python -m benchmarks.replay_traffic --log logs/query_log.jsonl --speed 2
+    python -m benchmarks.replay_traffic --redis --target http://staging:8000 --limit 5000
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Sequence
+
+import httpx
+
+from api_client import TelegramRAGClient
+from services.query_log import read_query_log_file, read_query_log_stream
+
+# Far above real Telegram user ids, so replayed traffic is easy to tell apart
+SYNTHETIC_USER_BASE = 9_000_000_000
+
+def percentile(ordered: Sequence[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def latency_line(name: str, samples: List[float]) -> str:
+    ordered = sorted(samples)
+    return (
+        f"{name:<22} p50: {percentile(ordered, 0.50):8.1f} ms   "
+        f"p95: {percentile(ordered, 0.95):8.1f} ms   "
+        f"p99: {percentile(ordered, 0.99):8.1f} ms   "
+        f"max: {(ordered[-1] if ordered else 0.0):8.1f} ms"
+    )
+
+async def load_entries(args) -> List[Dict[str, Any]]:
+    if args.redis:
+        from services.redis_client import get_redis_client
+        entries = await read_query_log_stream(await get_redis_client())
+    else:
+        entries = list(read_query_log_file(args.log))
+    entries.sort(key=lambda entry: entry["ts"])
+    return entries[:args.limit] if args.limit else entries
+
+async def replay(client: TelegramRAGClient, entries: List[Dict[str, Any]], speed: float, max_in_flight: int):
+    """Send every entry at its scaled offset from the first one"""
+    users: Dict[str, int] = {}
+    for entry in entries:
+        users.setdefault(entry["user"], SYNTHETIC_USER_BASE + len(users))
+
+    update_base = int(time.time() * 1000)
+    semaphore = asyncio.Semaphore(max_in_flight)
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    first_ts = entries[0]["ts"]
+    started = time.monotonic()
+
+    async def send(i: int, entry: Dict[str, Any]):
+        delay = (entry["ts"] - first_ts) / speed - (time.monotonic() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        user_id = users[entry["user"]]
+        async with semaphore:
+            sent = time.perf_counter()
+            try:
+                result = await client.simulate_telegram_message(user_id, user_id, entry["query"], update_base + i)
+                outcomes[result.get("status", "error")] += 1
+            except Exception:
+                outcomes["error"] += 1
+            latencies.append((time.perf_counter() - sent) * 1000)
+
+    await asyncio.gather(*(send(i, entry) for i, entry in enumerate(entries)))
+    return set(users.values()), latencies, outcomes, time.monotonic() - started
+
+async def processing_latencies(client: TelegramRAGClient, user_ids: set, expected: int) -> List[Dict[str, Any]]:
+    """Feed events of the replayed users, newest first, until all are found or the feed ends"""
+    wanted = {f"@{user_id}" for user_id in user_ids}
+    found: List[Dict[str, Any]] = []
+    cursor = None
+    while len(found) < expected:
+        events, cursor = await client.get_recent_conversations(limit=100, before=cursor)
+        found.extend(event for event in events if event["user"] in wanted)
+        if not cursor:
+            break
+    return found
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--log", help="query log file written with QUERY_LOG_MODE=file")
+    source.add_argument("--redis", action="store_true", help="read the query log stream from the Redis in .env")
+    parser.add_argument("--target", default="http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="pacing multiplier, 2 replays twice as fast")
+    parser.add_argument("--limit", type=int, default=0, help="replay only the first N entries")
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for the webhook to answer")
+    parser.add_argument("--settle", type=float, default=30.0, help="seconds to wait for processing before reading the feed")
+    args = parser.parse_args()
+
+    entries = await load_entries(args)
+    if not entries:
+        print("Query log is empty")
+        return
+
+    # One connection per in-flight request, so measured latency never
+    # includes waiting for a free connection in the tool's own pool
+    client = TelegramRAGClient(
+        args.target,
+        limits=httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight),
+        timeout=httpx.Timeout(args.timeout)
+    )
+    try:
+        original = entries[-1]["ts"] - entries[0]["ts"]
+        print(f"Replaying {len(entries)} queries spanning {original:.1f}s at {args.speed}x against {args.target}")
+        user_ids, latencies, outcomes, elapsed = await replay(client, entries, args.speed, args.max_in_flight)
+
+        print(f"{'sent':<22} {len(entries)} in {elapsed:.1f}s ({len(entries) / max(elapsed, 1e-9):.1f} msg/s)")
+        print(f"{'webhook outcomes':<22} {dict(outcomes)}")
+        print(latency_line("webhook latency", latencies))
+
+        await asyncio.sleep(args.settle)
+        events = await processing_latencies(client, user_ids, outcomes.get("processing", 0))
+        print(f"{'processed':<22} {len(events)} {dict(Counter(event['status'] for event in events))}")
+        print(latency_line("processing latency", [event["latency_ms"] for event in events]))
+    finally:
+        await client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
@@ -9,8 +9,15 @@ from dotenv import load_dotenv
 
 from routers import telegram, dashboard, scraping, knowledge, auth
 from services.database import init_databases
-from services.redis_client import get_redis_client
-from services.milvus_client import get_milvus_client
+from services.redis_client import get_redis_pool_stats, close_redis, cache_manager
+from services.health_prober import health_prober
+from services.dashboard_events import dashboard_events
+from services.http_client import http_clients
+from services.metrics import render_metrics, METRICS_CONTENT_TYPE
+from services.telegram_sender import telegram_sender
+from services.processing_engine import processing_engine
+from services.conversation_memory import conversation_summarizer
+from tasks.telegram_poller import telegram_poller
 from utils.config import settings
 
 load_dotenv()
@@ -24,9 +31,26 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Telegram RAG Chatbot Backend...")
     await init_databases()
     logger.info("Databases initialized successfully")
+    cache_manager.start()
+    health_prober.start()
+    dashboard_events.start()
+    telegram_sender.start()
+    processing_engine.start()
+    if settings.TELEGRAM_INGESTION_MODE == "polling":
+        await telegram_poller.start()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await telegram_poller.stop()
+    await processing_engine.stop()
+    await conversation_summarizer.stop()
+    await telegram_sender.stop()
+    await cache_manager.stop()
+    await health_prober.stop()
+    await dashboard_events.stop()
+    await http_clients.aclose()
+    logger.info("HTTP clients closed")
+    await close_redis()
 
 app = FastAPI(
     title="Telegram RAG Chatbot API",
@@ -55,32 +79,25 @@ app.include_router(knowledge.router, prefix="/api/knowledge", tags=["knowledge"]
 async def root():
     return {"message": "Telegram RAG Chatbot API is running"}
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for monitoring"""
-    try:
-        redis_client = await get_redis_client()
-        await redis_client.ping()
-        redis_status = "healthy"
-    except Exception as e:
-        logger.error(f"Redis health check failed: {e}")
-        redis_status = "unhealthy"
-    
-    try:
-        milvus_client = get_milvus_client()
-        # Simple connection test
-        milvus_status = "healthy"
-    except Exception as e:
-        logger.error(f"Milvus health check failed: {e}")
-        milvus_status = "unhealthy"
-    
+    # Dependencies are probed in the background; this only reads the cached results
     return {
         "status": "healthy",
         "services": {
-            "redis": redis_status,
-            "milvus": milvus_status,
+            **health_prober.get_services(),
             "api": "healthy"
-        }
+        },
+        "checks": health_prober.get_details(),
+        "http_pools": http_clients.get_stats(),
+        "redis_pools": get_redis_pool_stats(),
+        "local_cache": cache_manager.get_stats()
     }
 
 if __name__ == "__main__":
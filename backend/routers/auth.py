@@ -2,10 +2,14 @@ from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
+import time
 import jwt
 import bcrypt
 from datetime import datetime, timedelta
 from loguru import logger
+from services.local_cache import LocalCache
+from utils.config import settings
 
 router = APIRouter()
 security = HTTPBearer()
@@ -19,10 +23,24 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 DEMO_USERS = {
     "admin": {
         "username": "admin",
-        "hashed_password": bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt()).decode('utf-8'),
+        "hashed_password": None,  # hashed on first use, not at import
         "role": "admin"
     }
 }
+DEMO_PASSWORDS = {"admin": "admin123"}
+
+# bcrypt is deliberately slow and holds a thread for its whole run, so calls
+# go to the thread pool and are capped to leave room for other blocking work
+_hash_semaphore = asyncio.Semaphore(settings.AUTH_HASH_CONCURRENCY)
+# Guards the stored hashes, so the first-use hash and a password change never
+# overwrite each other across the awaits in between
+_password_lock = asyncio.Lock()
+
+# Verified token -> username, kept no longer than the token's own expiry
+_token_cache = LocalCache(
+    max_entries=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
 
 class LoginRequest(BaseModel):
     username: str
@@ -33,9 +51,27 @@ class LoginResponse(BaseModel):
     token_type: str
     user: dict
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    async with _hash_semaphore:
+        return await asyncio.to_thread(
+            bcrypt.checkpw, plain_password.encode('utf-8'), hashed_password.encode('utf-8')
+        )
+
+async def hash_password(password: str) -> str:
+    """Hash a password with a fresh salt"""
+    async with _hash_semaphore:
+        hashed = await asyncio.to_thread(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt())
+    return hashed.decode('utf-8')
+
+async def get_hashed_password(user: dict) -> str:
+    """Stored hash of a user, hashing a demo password the first time it is needed"""
+    if user["hashed_password"] is None:
+        async with _password_lock:
+            # Another request may have hashed it, or the password changed, while waiting
+            if user["hashed_password"] is None:
+                user["hashed_password"] = await hash_password(DEMO_PASSWORDS[user["username"]])
+    return user["hashed_password"]
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
@@ -48,13 +84,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token"""
+    token = credentials.credentials
+    username = _token_cache.get(token)
+    if username is not None:
+        return username
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        # Only valid tokens are cached, so garbage tokens cannot evict real ones
+        expires_at = payload.get("exp")
+        if expires_at is not None and expires_at > time.time():
+            _token_cache.set(token, username, ttl=expires_at - time.time())
         return username
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid authentication credentials")
@@ -65,7 +109,7 @@ async def login(login_request: LoginRequest):
     try:
         user = DEMO_USERS.get(login_request.username)
         
-        if not user or not verify_password(login_request.password, user["hashed_password"]):
+        if not user or not await verify_password(login_request.password, await get_hashed_password(user)):
             raise HTTPException(
                 status_code=401,
                 detail="Incorrect username or password"
@@ -120,13 +164,18 @@ async def change_password(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    if not verify_password(old_password, user["hashed_password"]):
+    old_hashed_password = await get_hashed_password(user)
+    if not await verify_password(old_password, old_hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect old password")
     
     # Hash new password
-    new_hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    new_hashed_password = await hash_password(new_password)
     
-    # Update password (in production, update in database)
-    DEMO_USERS[current_user]["hashed_password"] = new_hashed_password
+    # Update password (in production, update in database), unless another
+    # change landed while hashing, which the old password no longer matches
+    async with _password_lock:
+        if user["hashed_password"] != old_hashed_password:
+            raise HTTPException(status_code=409, detail="Password was changed concurrently, try again")
+        user["hashed_password"] = new_hashed_password
     
     return {"message": "Password changed successfully"}
\ No newline at end of file
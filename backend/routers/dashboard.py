@@ -1,16 +1,29 @@
-from fastapi import APIRouter
-from typing import List, Dict, Any
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional, Hashable, Callable, Awaitable
 from loguru import logger
+import asyncio
 
-from services.dashboard_service import dashboard_service
+from services.dashboard_service import dashboard_service, activity_cache_key
+from services.resilience import get_circuit_breaker_states
+from services.response_cache import dashboard_cache, with_data_age
+from services.dashboard_events import dashboard_events, format_sse
+from services.conversation_feed import conversation_feed
+from utils.config import settings
 
 router = APIRouter()
 
+async def cached(response: Response, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+    """Serve a dashboard payload from the stale-while-revalidate cache, stamped with its age"""
+    value, age = await dashboard_cache.get(key, compute)
+    response.headers["Age"] = str(int(age))
+    return with_data_age(value, age)
+
 @router.get("/metrics")
-async def get_dashboard_metrics():
+async def get_dashboard_metrics(response: Response):
     """Get dashboard metrics"""
     try:
-        return await dashboard_service.get_system_metrics()
+        return await cached(response, "metrics", dashboard_service.get_system_metrics)
     except Exception as e:
         logger.error(f"Error getting dashboard metrics: {e}")
         return {
@@ -25,54 +38,74 @@ async def get_dashboard_metrics():
         }
 
 @router.get("/system-status")
-async def get_system_status():
+async def get_system_status(response: Response):
     """Get system status for all services"""
     try:
-        return await dashboard_service.get_system_health()
+        return await cached(response, "system-status", dashboard_service.get_system_health)
     except Exception as e:
         logger.error(f"Error getting system status: {e}")
         return []
 
+@router.get("/circuit-breakers")
+async def get_circuit_breakers():
+    """Get circuit breaker state for pipeline dependencies"""
+    return get_circuit_breaker_states()
+
+@router.get("/stream")
+async def stream_dashboard_events(request: Request):
+    """Server-Sent Events: metric deltas, latest activity bucket and scraping job progress"""
+    async def events():
+        async with dashboard_events.subscribe() as queue:
+            try:
+                yield format_sse("metrics", await dashboard_events.snapshot())
+            except Exception as e:
+                logger.error(f"Error sending dashboard snapshot: {e}")
+            
+            while not await request.is_disconnected():
+                try:
+                    event_type, data = await asyncio.wait_for(queue.get(), settings.DASHBOARD_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event_type, data)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache")
+async def get_dashboard_cache_stats():
+    """Get dashboard response cache and stream statistics"""
+    return {**dashboard_cache.get_stats(), "stream": dashboard_events.get_stats()}
+
 @router.get("/conversations")
-async def get_recent_conversations():
-    """Get recent conversations"""
-    # This would typically fetch from Redis/database
-    return [
-        {
-            "id": 1,
-            "user": "@john_doe",
-            "message": "How do I reset my password?",
-            "time": "2 min ago",
-            "status": "resolved"
-        },
-        {
-            "id": 2,
-            "user": "@sarah_smith",
-            "message": "What are your business hours?",
-            "time": "5 min ago",
-            "status": "resolved"
-        },
-        {
-            "id": 3,
-            "user": "@mike_wilson",
-            "message": "Can you help with billing issues?",
-            "time": "8 min ago",
-            "status": "pending"
-        },
-        {
-            "id": 4,
-            "user": "@emma_brown",
-            "message": "Product information needed",
-            "time": "12 min ago",
-            "status": "resolved"
-        }
-    ]
+async def get_recent_conversations(response: Response, limit: int = 20, before: Optional[str] = None):
+    """Get recent conversations, newest first; pass X-Next-Cursor back as `before` for older ones"""
+    try:
+        events, next_cursor = await conversation_feed.read(before, max(1, min(limit, 100)))
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return events
+    except Exception as e:
+        logger.error(f"Error getting recent conversations: {e}")
+        return []
 
 @router.get("/activity")
-async def get_activity_data():
+async def get_activity_data(response: Response, hours: int = 24, resolution: Optional[str] = None):
     """Get activity data for charts"""
+    hours = max(1, min(hours, 400 * 24))
+    # Unknown resolutions share the entry of the one actually served
+    key = activity_cache_key(hours, resolution)
+    resolution = key[2]
     try:
-        return await dashboard_service.get_activity_data()
+        return await cached(
+            response,
+            key,
+            lambda: dashboard_service.get_activity_data(hours, resolution)
+        )
     except Exception as e:
         logger.error(f"Error getting activity data: {e}")
         return []
\ No newline at end of file
@@ -8,6 +8,7 @@ import uuid
 from services.scraping_service import scraping_service
 from services.embedding_service import embedding_service
 from services.milvus_client import vector_store
+from services.dashboard_events import dashboard_events
 
 router = APIRouter()
 
@@ -27,6 +28,10 @@ class ScrapingStatus(BaseModel):
 # In-memory job storage (in production, use Redis or database)
 scraping_jobs = {}
 
+async def publish_job_update(job_id: str):
+    """Push the job's current state to live dashboards"""
+    await dashboard_events.publish("scraping_job", scraping_jobs[job_id])
+
 @router.post("/start")
 async def start_scraping_job(job: ScrapingJob, background_tasks: BackgroundTasks):
     """Start a new scraping job"""
@@ -45,6 +50,7 @@ async def start_scraping_job(job: ScrapingJob, background_tasks: BackgroundTasks
             "documents_created": 0,
             "errors": 0
         }
+        await publish_job_update(job_id)
         
         # Start scraping in background
         background_tasks.add_task(
@@ -82,6 +88,7 @@ async def cancel_scraping_job(job_id: str):
             raise HTTPException(status_code=404, detail="Job not found")
         
         scraping_jobs[job_id]["status"] = "cancelled"
+        await publish_job_update(job_id)
         logger.info(f"Scraping job {job_id} cancelled")
         
         return {"message": f"Scraping job {job_id} cancelled"}
@@ -107,6 +114,7 @@ async def run_scraping_job(job_id: str, urls: List[str], max_depth: int, max_pag
             try:
                 job["current_url"] = url
                 job["progress"] = int((i / len(urls)) * 100)
+                await publish_job_update(job_id)
                 
                 logger.info(f"Scraping {url}")
                 documents = await scraping_service.scrape_website(url, max_depth, max_pages)
@@ -125,6 +133,7 @@ async def run_scraping_job(job_id: str, urls: List[str], max_depth: int, max_pag
                     
                     total_documents += len(documents)
                     job["documents_created"] = total_documents
+                    await publish_job_update(job_id)
                     
                     logger.info(f"Indexed {len(documents)} documents from {url}")
                 
@@ -135,6 +144,7 @@ async def run_scraping_job(job_id: str, urls: List[str], max_depth: int, max_pag
         job["status"] = "completed" if job["status"] != "cancelled" else "cancelled"
         job["progress"] = 100
         job["completed_at"] = time.time()
+        await publish_job_update(job_id)
         
         logger.info(f"Scraping job {job_id} completed. Total documents: {total_documents}")
         
@@ -142,4 +152,5 @@ async def run_scraping_job(job_id: str, urls: List[str], max_depth: int, max_pag
         logger.error(f"Error in scraping job {job_id}: {e}")
         if job_id in scraping_jobs:
             scraping_jobs[job_id]["status"] = "failed"
-            scraping_jobs[job_id]["error"] = str(e)
\ No newline at end of file
+            scraping_jobs[job_id]["error"] = str(e)
+            await publish_job_update(job_id)
\ No newline at end of file
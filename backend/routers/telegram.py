@@ -1,18 +1,38 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from loguru import logger
+import asyncio
 import time
 
 from services.redis_client import conversation_manager
+from services.conversation_memory import conversation_summarizer
+from services.usage_counters import usage_counters
 from services.embedding_service import embedding_service
 from services.milvus_client import vector_store
 from services.reranker_service import reranker_service
-from services.llm_service import llm_service
+from services.llm_service import llm_service, ERROR_REPLY, OVERLOADED_REPLY
+from services.llm_scheduler import llm_scheduler
+from services.llm_balancer import llm_balancer
+from services.http_client import http_clients
+from services.telegram_sender import telegram_sender
+from services.processing_engine import processing_engine
+from services.update_deduplicator import update_deduplicator
+from services.resilience import Deadline
+from services.stage_timer import StageTimings, pipeline_timing_stats
+from services.metrics import MESSAGE_LATENCY, TELEGRAM_UPDATES, track_stage
+from services.latency_sketch import response_latency_sketch
+from services.activity_rollups import activity_rollups
+from services.conversation_feed import conversation_feed
+from services.query_log import query_log
+from services.health_prober import health_prober
+from services.request_coalescer import retrieval_coalescer, answer_coalescer, normalize_query
 from utils.config import settings
 
 router = APIRouter()
 
+BUSY_REPLY = "I'm handling a lot of messages right now. Please send your question again in a minute."
+
 class TelegramUpdate(BaseModel):
     update_id: int
     message: Dict[str, Any]
@@ -23,106 +43,217 @@ class TelegramResponse(BaseModel):
     text: str
 
 @router.post("/webhook")
-async def telegram_webhook(update: TelegramUpdate, background_tasks: BackgroundTasks):
+async def telegram_webhook(update: TelegramUpdate):
     """Handle incoming Telegram webhook"""
     try:
-        message = update.message
-        chat_id = message.get("chat", {}).get("id")
-        user_id = str(message.get("from", {}).get("id"))
-        text = message.get("text", "")
-        
-        if not text or not chat_id:
-            return {"status": "ignored"}
-        
-        # Process message in background
-        background_tasks.add_task(process_message, user_id, chat_id, text)
-        
-        return {"status": "processing"}
+        status = await handle_update(update.update_id, update.message)
+        return {"status": status}
         
     except Exception as e:
         logger.error(f"Error processing webhook: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def handle_update(update_id: int, message: Optional[Dict[str, Any]]) -> str:
+    """Handle one Telegram update and count its outcome"""
+    return (await handle_updates([(update_id, message)]))[0]
+
+async def handle_updates(updates: List[Tuple[int, Optional[Dict[str, Any]]]]) -> List[str]:
+    """Deduplicate a batch of updates in one round trip and queue their messages in order"""
+    parsed = [parse_message(message) for _, message in updates]
+    # Telegram retries slow webhooks and polling may replay a batch after a restart
+    seen = iter(await update_deduplicator.check_many([
+        update_id for (update_id, _), message in zip(updates, parsed) if message is not None
+    ]))
+    
+    statuses = []
+    for message in parsed:
+        if message is None:
+            status = "ignored"
+        elif next(seen):
+            status = "duplicate"
+        # Process message on the worker pool, in order for this user
+        elif not await dispatch_message(*message):
+            status = "overloaded"
+        else:
+            status = "processing"
+        TELEGRAM_UPDATES.labels(status=status).inc()
+        statuses.append(status)
+    return statuses
+
+def parse_message(message: Optional[Dict[str, Any]]) -> Optional[Tuple[str, int, str]]:
+    """Extract (user_id, chat_id, text) from a Telegram message, or None if there is nothing to answer"""
+    if not message:
+        return None
+    
+    chat_id = message.get("chat", {}).get("id")
+    user_id = str(message.get("from", {}).get("id"))
+    text = message.get("text", "")
+    
+    if not text or not chat_id:
+        return None
+    return user_id, chat_id, text
+
+async def dispatch_message(user_id: str, chat_id: int, text: str) -> bool:
+    """Queue a message for processing, telling the user when it has to be shed"""
+    if processing_engine.submit(user_id, process_message, user_id, chat_id, text):
+        return True
+    await send_telegram_message(chat_id, BUSY_REPLY)
+    return False
+
 async def process_message(user_id: str, chat_id: int, text: str):
     """Process incoming message and generate response"""
+    deadline = Deadline(settings.MESSAGE_DEADLINE_SECONDS)
+    timings = StageTimings()
+    retrieval = None
     try:
-        # Get conversation history
-        conversation_history = await conversation_manager.get_conversation_history(user_id)
+        # Retrieval does not depend on history, so it can start before history is read
+        if settings.SPECULATIVE_RETRIEVAL:
+            retrieval = asyncio.ensure_future(
+                timings.measure("retrieval", retrieve_documents(text, deadline))
+            )
         
-        # Add user message to history
-        await conversation_manager.add_message(user_id, {
-            "role": "user",
-            "content": text,
-            "timestamp": int(time.time())
-        })
+        # Get conversation history and summary and add the user message in one round trip
+        conversation_history, conversation_summary = await timings.measure(
+            "history",
+            conversation_manager.get_memory_and_append(user_id, {
+                "role": "user",
+                "content": text,
+                "timestamp": int(time.time())
+            })
+        )
         
-        # Generate embedding for user query
-        query_embedding = await embedding_service.embed_text(text)
+        if retrieval is None:
+            retrieval = asyncio.ensure_future(
+                timings.measure("retrieval", retrieve_documents(text, deadline))
+            )
+        reranked_docs = await retrieval
         
-        # Retrieve similar documents from vector store
-        similar_docs = await vector_store.search_similar(
-            query_embedding,
-            top_k=settings.RAG_TOP_K
+        # Generation, shared with identical in-flight questions
+        response = await timings.measure(
+            "generation",
+            answer_query(text, conversation_history, reranked_docs, deadline, conversation_summary)
         )
         
-        # Rerank documents
-        reranked_docs = await reranker_service.rerank_documents(
-            text,
-            similar_docs,
-            top_k=settings.RAG_TOP_RERANK
-        )
+        # Send response back to Telegram
+        sent = await timings.measure("send", send_telegram_message(chat_id, response))
         
-        # Prepare RAG context
-        rag_context = "\n\n".join([
-            f"Source: {doc.get('title', 'Unknown')} ({doc.get('source_url', 'Unknown')})\n{doc.get('text', '')}"
-            for doc in reranked_docs
-        ])
+        # Only a reply the user will actually get belongs in the history
+        if sent:
+            await timings.measure(
+                "history_reply",
+                conversation_manager.add_message(user_id, {
+                    "role": "assistant",
+                    "content": response,
+                    "timestamp": int(time.time())
+                })
+            )
+            
+            # Fold older turns into the summary once the reply is on its way
+            conversation_summarizer.schedule(user_id, len(conversation_history) + 2)
         
-        # Generate response using LLM
-        response = await llm_service.generate_response(
-            text,
-            conversation_history,
-            rag_context
+        MESSAGE_LATENCY.observe(timings.elapsed)
+        pipeline_timing_stats.record(timings)
+        status = "failed" if not sent or response in (ERROR_REPLY, OVERLOADED_REPLY) else "resolved"
+        await asyncio.gather(
+            response_latency_sketch.record(timings.elapsed),
+            activity_rollups.record(user_id, timings.elapsed),
+            conversation_feed.record(
+                user_id,
+                text,
+                status,
+                timings.elapsed
+            ),
+            query_log.record(user_id, text, timings, status)
         )
-        
-        # Add assistant response to history
-        await conversation_manager.add_message(user_id, {
-            "role": "assistant",
-            "content": response,
-            "timestamp": int(time.time())
-        })
-        
-        # Send response back to Telegram
-        await send_telegram_message(chat_id, response)
+        logger.debug(f"Message pipeline timings for {user_id}: {timings.summary()}")
         
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         await send_telegram_message(chat_id, "Sorry, I encountered an error processing your message.")
+        await conversation_feed.record(user_id, text, "failed", timings.elapsed)
+        await query_log.record(user_id, text, timings, "failed")
+    finally:
+        # Don't leave a speculative retrieval running after a failure
+        if retrieval is not None and not retrieval.done():
+            retrieval.cancel()
 
-async def send_telegram_message(chat_id: int, text: str):
-    """Send message to Telegram user"""
-    try:
-        import httpx
-        
-        bot_token = settings.TELEGRAM_BOT_TOKEN
-        if not bot_token:
-            logger.error("Telegram bot token not configured")
-            return
-        
-        url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json={
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": "Markdown"
-            })
-            response.raise_for_status()
-            
-        logger.info(f"Message sent to chat {chat_id}")
-        
-    except Exception as e:
-        logger.error(f"Error sending Telegram message: {e}")
+async def answer_query(
+    text: str,
+    conversation_history: List[Dict[str, Any]],
+    reranked_docs: List[Dict[str, Any]],
+    deadline: Optional[Deadline] = None,
+    conversation_summary: Optional[str] = None
+) -> str:
+    """Run generation, coalescing identical concurrent questions"""
+    # Prior turns can change the answer, so only history-free questions share a reply
+    if not settings.COALESCE_IDENTICAL_QUERIES or conversation_history or conversation_summary:
+        return await generate_answer(text, conversation_history, reranked_docs, deadline, conversation_summary)
+    
+    return await answer_coalescer.run(
+        normalize_query(text),
+        lambda: generate_answer(text, conversation_history, reranked_docs, deadline)
+    )
+
+async def generate_answer(
+    text: str,
+    conversation_history: List[Dict[str, Any]],
+    reranked_docs: List[Dict[str, Any]],
+    deadline: Optional[Deadline] = None,
+    conversation_summary: Optional[str] = None
+) -> str:
+    """Generate an LLM answer grounded on the retrieved knowledge base context"""
+    # Prepare RAG context
+    rag_context = "\n\n".join([
+        f"Source: {doc.get('title', 'Unknown')} ({doc.get('source_url', 'Unknown')})\n{doc.get('text', '')}"
+        for doc in reranked_docs
+    ])
+    
+    # Generate response using LLM
+    return await llm_service.generate_response(
+        text,
+        conversation_history,
+        rag_context,
+        deadline=deadline,
+        conversation_summary=conversation_summary
+    )
+
+async def retrieve_documents(text: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """Embed, search and rerank; retrieval never depends on history so it is always shared"""
+    if not settings.COALESCE_IDENTICAL_QUERIES:
+        return await _retrieve_documents(text, deadline)
+    
+    return await retrieval_coalescer.run(
+        normalize_query(text),
+        lambda: _retrieve_documents(text, deadline)
+    )
+
+async def _retrieve_documents(text: str, deadline: Optional[Deadline] = None) -> List[Dict[str, Any]]:
+    """Retrieve and rerank knowledge base documents for a query"""
+    # Generate embedding for user query
+    with track_stage("embed"):
+        query_embedding = await embedding_service.embed_text(text, deadline)
+    
+    # Retrieve similar documents from vector store
+    with track_stage("search"):
+        similar_docs = await vector_store.search_similar(
+            query_embedding,
+            top_k=settings.RAG_TOP_K,
+            deadline=deadline
+        )
+    
+    # Rerank documents
+    with track_stage("rerank"):
+        return await reranker_service.rerank_documents(
+            text,
+            similar_docs,
+            top_k=settings.RAG_TOP_RERANK,
+            deadline=deadline
+        )
+
+async def send_telegram_message(chat_id: int, text: str) -> bool:
+    """Queue a message for rate-limited delivery to a Telegram user; False if it was dropped"""
+    # Wait a little for room rather than dropping a reply on a momentary burst
+    return await telegram_sender.send(chat_id, text, timeout=settings.TELEGRAM_SEND_ENQUEUE_TIMEOUT)
 
 @router.get("/stats")
 async def get_telegram_stats():
@@ -131,17 +262,27 @@ async def get_telegram_stats():
         # Get real stats from Redis
         redis_client = await conversation_manager.get_redis_client()
         
-        # Count active users (users with conversations in last 24h)
-        active_users = 0
-        messages_today = 0
+        # Active users and messages over the last 24h from the write-path counters
+        usage = await usage_counters.get_daily_summary(redis_client)
+        latency = await response_latency_sketch.summarize(24 * 3600)
+        availability = health_prober.get_availability()
         
-        # In production, you'd implement proper analytics
-        # For now, return mock data
         return {
-            "active_users": 2847,
-            "messages_today": 18392,
-            "avg_response_time": 1.2,
-            "uptime": "99.9%"
+            "active_users": usage["active_users"],
+            "messages_today": usage["messages"],
+            "avg_response_time": round(latency["mean"], 2) if latency["mean"] is not None else 0,
+            "uptime": f"{availability:.1f}%" if availability is not None else "n/a",
+            "coalescing": {
+                "retrieval": retrieval_coalescer.get_stats(),
+                "answer": answer_coalescer.get_stats()
+            },
+            "llm_queue": llm_scheduler.get_stats(),
+            "llm_backends": llm_balancer.get_stats(),
+            "send_queue": telegram_sender.get_stats(),
+            "processing_queue": processing_engine.get_stats(),
+            "deduplication": update_deduplicator.get_stats(),
+            "pipeline_timings": pipeline_timing_stats.get_stats(),
+            "conversation_memory": conversation_summarizer.get_stats()
         }
         
     except Exception as e:
@@ -150,30 +291,26 @@ async def get_telegram_stats():
             "active_users": 0,
             "messages_today": 0,
             "avg_response_time": 0,
-            "uptime": "0%"
+            "uptime": "n/a"
         }
 
 @router.post("/set-webhook")
 async def set_telegram_webhook():
     """Set Telegram webhook URL"""
     try:
-        import httpx
-        
         bot_token = settings.TELEGRAM_BOT_TOKEN
         webhook_url = settings.TELEGRAM_WEBHOOK_URL
         
         if not bot_token or not webhook_url:
             raise HTTPException(status_code=400, detail="Bot token or webhook URL not configured")
         
-        url = f"https://api.telegram.org/bot{bot_token}/setWebhook"
+        client = http_clients.get("telegram")
+        response = await client.post(f"/bot{bot_token}/setWebhook", json={
+            "url": webhook_url
+        })
+        response.raise_for_status()
+        result = response.json()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json={
-                "url": webhook_url
-            })
-            response.raise_for_status()
-            result = response.json()
-            
         return {"status": "success", "result": result}
         
     except Exception as e:
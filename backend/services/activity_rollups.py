@@ -0,0 +1,98 @@
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from loguru import logger
+from .redis_client import get_redis_client
+
+# (name, bucket seconds, retention seconds). Every message is written to all
+# resolutions at once, so coarser buckets never need a separate rollup job.
+RESOLUTIONS: List[Tuple[str, int, int]] = [
+    ("minute", 60, 24 * 3600),
+    ("hour", 3600, 8 * 24 * 3600),
+    ("day", 86400, 400 * 86400)
+]
+
+# Charts never read more buckets than this, whatever the window
+MAX_POINTS = 200
+
+class ActivityRollups:
+    """Per-minute, hourly and daily message, user and latency aggregates in Redis"""
+
+    def __init__(self, prefix: str = "activity"):
+        self.prefix = prefix
+
+    def _key(self, resolution: str, bucket_start: int) -> str:
+        return f"{self.prefix}:{resolution}:{bucket_start}"
+
+    def _users_key(self, resolution: str, bucket_start: int) -> str:
+        return f"{self.prefix}:{resolution}:users:{bucket_start}"
+
+    async def record(self, user_id: str, latency: float, now: Optional[float] = None):
+        """Add one answered message to the current bucket of every resolution"""
+        try:
+            now = int(time.time() if now is None else now)
+            client = await get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for resolution, bucket_seconds, retention in RESOLUTIONS:
+                bucket_start = now - now % bucket_seconds
+                key = self._key(resolution, bucket_start)
+                users_key = self._users_key(resolution, bucket_start)
+                pipe.hincrby(key, "messages", 1)
+                pipe.hincrbyfloat(key, "latency_sum", latency)
+                pipe.expire(key, retention)
+                pipe.pfadd(users_key, user_id)
+                pipe.expire(users_key, retention)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording activity: {e}")
+
+    def resolution_for(self, window_seconds: int) -> Tuple[str, int]:
+        """Finest resolution that keeps the window within MAX_POINTS buckets and retention"""
+        for resolution, bucket_seconds, retention in RESOLUTIONS:
+            if window_seconds // bucket_seconds <= MAX_POINTS and window_seconds <= retention:
+                return resolution, bucket_seconds
+        resolution, bucket_seconds, _ = RESOLUTIONS[-1]
+        return resolution, bucket_seconds
+
+    def resolve(self, window_seconds: int, resolution: Optional[str] = None) -> Tuple[str, int]:
+        """The requested resolution if it exists, otherwise the automatic one for the window"""
+        for name, bucket_seconds, _ in RESOLUTIONS:
+            if name == resolution:
+                return name, bucket_seconds
+        return self.resolution_for(window_seconds)
+
+    async def get_series(
+        self,
+        window_seconds: int,
+        resolution: Optional[str] = None,
+        now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Chronological buckets covering the window, read in one round trip"""
+        resolution, bucket_seconds = self.resolve(window_seconds, resolution)
+
+        now = int(time.time() if now is None else now)
+        last_bucket = now - now % bucket_seconds
+        count = min(MAX_POINTS, max(1, window_seconds // bucket_seconds))
+        buckets = [last_bucket - i * bucket_seconds for i in reversed(range(count))]
+
+        client = await get_redis_client()
+        pipe = client.pipeline(transaction=False)
+        for bucket_start in buckets:
+            pipe.hgetall(self._key(resolution, bucket_start))
+            pipe.pfcount(self._users_key(resolution, bucket_start))
+        results = await pipe.execute()
+
+        series = []
+        for i, bucket_start in enumerate(buckets):
+            totals, users = results[2 * i], results[2 * i + 1]
+            messages = int(totals.get("messages", 0))
+            latency_sum = float(totals.get("latency_sum", 0.0))
+            series.append({
+                "timestamp": bucket_start,
+                "messages": messages,
+                "users": users,
+                "response_time": round(latency_sum / messages, 2) if messages else 0
+            })
+        return series
+
+# Global instance
+activity_rollups = ActivityRollups()
@@ -0,0 +1,65 @@
+import json
+import zlib
+from typing import Dict, Any, Union
+import msgpack
+
+# Every binary entry starts with a format byte. Legacy entries are JSON objects
+# and therefore start with '{', which never collides with these values.
+FORMAT_MSGPACK = 0x01
+FORMAT_MSGPACK_ZLIB = 0x02
+
+# Small integer codes for the common roles; anything else is stored verbatim
+ROLE_CODES = {"user": 0, "assistant": 1, "system": 2}
+ROLE_NAMES = {code: role for role, code in ROLE_CODES.items()}
+
+class ConversationCodec:
+    """Versioned compact encoding for stored conversation turns"""
+
+    def __init__(self, encoding: str = "msgpack", compress_threshold: int = 512):
+        self.encoding = encoding
+        self.compress_threshold = compress_threshold
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        """Encode a turn, compressing it when that makes it smaller"""
+        if self.encoding == "json":
+            return json.dumps(message).encode("utf-8")
+
+        role = message.get("role", "user")
+        extra = {k: v for k, v in message.items() if k not in ("role", "content", "timestamp")}
+        fields = [
+            ROLE_CODES.get(role, role),
+            message.get("content", ""),
+            message.get("timestamp", 0)
+        ]
+        if extra:
+            fields.append(extra)
+
+        packed = msgpack.packb(fields, use_bin_type=True)
+        if len(packed) >= self.compress_threshold:
+            compressed = zlib.compress(packed, 6)
+            if len(compressed) < len(packed):
+                return bytes([FORMAT_MSGPACK_ZLIB]) + compressed
+        return bytes([FORMAT_MSGPACK]) + packed
+
+    def decode(self, raw: Union[bytes, str]) -> Dict[str, Any]:
+        """Decode a stored turn in any supported format, including legacy JSON"""
+        if isinstance(raw, str):
+            return json.loads(raw)
+
+        version = raw[0]
+        if version == FORMAT_MSGPACK:
+            fields = msgpack.unpackb(raw[1:], raw=False)
+        elif version == FORMAT_MSGPACK_ZLIB:
+            fields = msgpack.unpackb(zlib.decompress(raw[1:]), raw=False)
+        else:
+            return json.loads(raw)
+
+        role = fields[0]
+        message = {
+            "role": ROLE_NAMES.get(role, role),
+            "content": fields[1],
+            "timestamp": fields[2]
+        }
+        if len(fields) > 3:
+            message.update(fields[3])
+        return message
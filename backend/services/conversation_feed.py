@@ -0,0 +1,73 @@
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from loguru import logger
+from utils.config import settings
+from .redis_client import get_redis_client
+
+FEED_KEY = "conversation_feed"
+TEXT_LIMIT = 200
+
+class ConversationFeed:
+    """Recent conversation events in a capped Redis stream"""
+
+    def __init__(self, key: str = FEED_KEY, maxlen: int = 10000):
+        self.key = key
+        self.maxlen = maxlen
+
+    async def record(self, user_id: str, text: str, status: str, latency: float):
+        """Append one compact event; MAXLEN ~ keeps trimming amortized O(1)"""
+        try:
+            client = await get_redis_client()
+            await client.xadd(
+                self.key,
+                {
+                    "u": user_id,
+                    "t": text[:TEXT_LIMIT],
+                    "s": status,
+                    "l": int(latency * 1000)
+                },
+                maxlen=self.maxlen,
+                approximate=True
+            )
+        except Exception as e:
+            logger.error(f"Error recording conversation event: {e}")
+
+    async def read(self, before: Optional[str] = None, limit: int = 20) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest events first, older than the `before` cursor; returns (events, next cursor)"""
+        client = await get_redis_client()
+        # An exclusive start so the cursor entry itself is not returned again
+        entries = await client.xrevrange(
+            self.key,
+            max=f"({before}" if before else "+",
+            min="-",
+            count=limit
+        )
+
+        now = time.time()
+        events = []
+        for entry_id, fields in entries:
+            timestamp = int(entry_id.split("-")[0]) / 1000
+            events.append({
+                "id": entry_id,
+                "user": f"@{fields.get('u', 'unknown')}",
+                "message": fields.get("t", ""),
+                "time": time_ago(now - timestamp),
+                "status": fields.get("s", "resolved"),
+                "latency_ms": int(fields.get("l", 0))
+            })
+
+        next_cursor = entries[-1][0] if len(entries) == limit else None
+        return events, next_cursor
+
+def time_ago(seconds: float) -> str:
+    """Human readable age, e.g. '2 min ago'"""
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
+
+# Global instance
+conversation_feed = ConversationFeed(maxlen=settings.CONVERSATION_FEED_MAXLEN)
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Dict, Any, Set
+from loguru import logger
+from utils.config import settings
+from .redis_client import conversation_manager
+from .llm_service import llm_service, LLM_TIMEOUT
+
+# Longest a summary update may take: a full wait in the batch queue, then the
+# primary request and a hedge started just before the primary times out
+SUMMARY_UPDATE_TIMEOUT = settings.LLM_BATCH_QUEUE_TIMEOUT + 2 * LLM_TIMEOUT
+# The lock outlives the update, so it never expires while the update still runs
+SUMMARY_LOCK_TTL = int(SUMMARY_UPDATE_TIMEOUT) + 30
+
+class ConversationSummarizer:
+    """Fold older conversation turns into a rolling summary, off the reply path"""
+
+    def __init__(self, recent_turns: int, batch_size: int):
+        self.recent_turns = recent_turns
+        self.batch_size = batch_size
+        self._pending: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.updates = 0
+        self.turns_folded = 0
+        self.failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.CONVERSATION_MEMORY_MODE == "summary"
+
+    def schedule(self, user_id: str, history_length: int):
+        """Start a background summary update once enough turns are waiting to be folded"""
+        if not self.enabled or history_length < self.recent_turns + self.batch_size:
+            return
+        if user_id in self._pending:
+            return
+
+        self._pending.add(user_id)
+        task = asyncio.create_task(self._update(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _update(self, user_id: str):
+        """Summarize everything older than the recent turns and trim it from the list"""
+        token = None
+        try:
+            token = await conversation_manager.acquire_summary_lock(user_id, SUMMARY_LOCK_TTL)
+            if token is None:
+                return
+
+            async with asyncio.timeout(SUMMARY_UPDATE_TIMEOUT):
+                folded, older, summary = await conversation_manager.get_summary_input(user_id, self.recent_turns)
+                if len(older) < self.batch_size:
+                    return
+
+                # History is newest first, the summarizer wants it in order
+                new_summary = await llm_service.summarize_conversation(summary, list(reversed(older)))
+                if not new_summary:
+                    self.failures += 1
+                    return
+
+                await conversation_manager.replace_summary(user_id, new_summary, folded)
+            self.updates += 1
+            self.turns_folded += len(older)
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Error updating conversation summary for {user_id}: {e!r}")
+        finally:
+            if token is not None:
+                try:
+                    if not await conversation_manager.release_summary_lock(user_id, token):
+                        logger.warning(f"Conversation summary lock for {user_id} expired before the update finished")
+                except Exception as e:
+                    logger.warning(f"Error releasing conversation summary lock: {e}")
+            self._pending.discard(user_id)
+
+    async def stop(self):
+        """Cancel summary updates still in flight"""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summary update statistics"""
+        return {
+            "mode": settings.CONVERSATION_MEMORY_MODE,
+            "pending": len(self._pending),
+            "updates": self.updates,
+            "turns_folded": self.turns_folded,
+            "failures": self.failures
+        }
+
+# Global instance
+conversation_summarizer = ConversationSummarizer(
+    recent_turns=settings.CONVERSATION_RECENT_TURNS,
+    batch_size=settings.CONVERSATION_SUMMARY_BATCH
+)
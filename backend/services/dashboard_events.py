@@ -0,0 +1,159 @@
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set
+from loguru import logger
+from utils.config import settings
+from .redis_client import get_redis_client
+from .dashboard_service import dashboard_service, activity_cache_key
+from .response_cache import dashboard_cache
+
+class DashboardEventHub:
+    """Fan dashboard events out to this worker's stream subscribers"""
+
+    # Metrics are computed by one publisher loop per worker, however many
+    # dashboards are open, and only the fields that changed are pushed.
+    # Events raised in one worker (scraping job progress) go through Redis
+    # pub/sub so subscribers connected to every worker see them.
+
+    def __init__(self, channel: str, interval: float, subscriber_queue_size: int = 100):
+        self.channel = channel
+        self.interval = interval
+        self.subscriber_queue_size = subscriber_queue_size
+        self.instance_id = uuid.uuid4().hex
+        self._subscribers: Set[asyncio.Queue] = set()  # (event type, data) pairs
+        self._tasks: List[asyncio.Task] = []
+        self._metrics: Optional[Dict[str, Any]] = None
+        self._latest_activity: Optional[Dict[str, Any]] = None
+        self.events_published = 0
+        self.events_dropped = 0
+
+    def start(self):
+        """Start the metrics publisher and the cross-worker listener"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._publish_metrics()),
+                asyncio.create_task(self._listen())
+            ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """Register a stream subscriber for the duration of the block"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.subscriber_queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    async def snapshot(self) -> Dict[str, Any]:
+        """Full metrics for a subscriber that just connected"""
+        metrics, _ = await dashboard_cache.get("metrics", dashboard_service.get_system_metrics)
+        return metrics
+
+    def _broadcast(self, event_type: str, data: Any):
+        """Queue an event for every local subscriber, dropping the oldest for slow ones"""
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()
+                self.events_dropped += 1
+            queue.put_nowait((event_type, data))
+
+    async def publish(self, event_type: str, data: Any):
+        """Send an event to subscribers on every worker"""
+        self.events_published += 1
+        try:
+            client = await get_redis_client()
+            await client.publish(self.channel, json.dumps({
+                "origin": self.instance_id,
+                "type": event_type,
+                "data": data
+            }, default=str))
+        except Exception as e:
+            logger.warning(f"Error publishing dashboard event, delivering locally only: {e}")
+        # Local subscribers get it directly; the listener skips our own messages
+        self._broadcast(event_type, data)
+
+    async def _publish_metrics(self):
+        """Compute metrics once per interval and push what changed"""
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self._subscribers:
+                # Nobody watching, start from a full comparison next time
+                self._metrics = None
+                self._latest_activity = None
+                continue
+            try:
+                metrics, _ = await dashboard_cache.get("metrics", dashboard_service.get_system_metrics)
+                changed = {
+                    key: value for key, value in metrics.items()
+                    if self._metrics is None or self._metrics.get(key) != value
+                }
+                self._metrics = metrics
+                if changed:
+                    self._broadcast("metrics", changed)
+
+                activity, _ = await dashboard_cache.get(
+                    activity_cache_key(24),
+                    lambda: dashboard_service.get_activity_data(24)
+                )
+                if activity and activity[-1] != self._latest_activity:
+                    self._latest_activity = activity[-1]
+                    self._broadcast("activity", activity[-1])
+            except Exception as e:
+                logger.error(f"Error computing dashboard stream update: {e}")
+
+    async def _listen(self):
+        """Relay events published by other workers, resubscribing after errors"""
+        backoff = 1.0
+        while True:
+            pubsub = None
+            try:
+                client = await get_redis_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.channel)
+                backoff = 1.0
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None or message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != self.instance_id:
+                        self._broadcast(payload["type"], payload["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Dashboard event listener error, retrying in {backoff:.0f}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get subscriber and event counts"""
+        return {
+            "subscribers": len(self._subscribers),
+            "events_published": self.events_published,
+            "events_dropped": self.events_dropped
+        }
+
+def format_sse(event_type: str, data: Any) -> str:
+    """Encode one Server-Sent Events message"""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+# Global instance
+dashboard_events = DashboardEventHub(
+    channel=settings.DASHBOARD_EVENTS_CHANNEL,
+    interval=settings.DASHBOARD_PUSH_INTERVAL
+)
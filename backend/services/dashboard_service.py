@@ -1,10 +1,15 @@
-from typing import Dict, List, Any
-from datetime import datetime, timedelta
-import random
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime
 from loguru import logger
 
 from .redis_client import get_redis_client
 from .milvus_client import vector_store
+from .latency_sketch import response_latency_sketch
+from .usage_counters import usage_counters, percent_change
+from .activity_rollups import activity_rollups
+from .health_prober import health_prober
+
+DAY_SECONDS = 24 * 3600
 
 class DashboardService:
     """Service for dashboard metrics and analytics"""
@@ -13,17 +18,21 @@ class DashboardService:
         """Get comprehensive system metrics"""
         try:
             # Get real metrics from various sources
-            redis_stats = await self._get_redis_stats()
+            usage_stats = await self._get_usage_stats()
             milvus_stats = await self._get_milvus_stats()
+            latency_stats = await self._get_latency_stats()
             
             return {
-                "active_users": redis_stats.get("active_users", 2847),
-                "messages_today": redis_stats.get("messages_today", 18392),
-                "avg_response_time": 1.2,  # Would be calculated from logs
+                "active_users": usage_stats["active_users"],
+                "messages_today": usage_stats["messages_today"],
+                "avg_response_time": latency_stats["avg_response_time"],
+                "p50_response_time": latency_stats["p50_response_time"],
+                "p95_response_time": latency_stats["p95_response_time"],
+                "p99_response_time": latency_stats["p99_response_time"],
                 "rag_accuracy": 94.7,  # Would be calculated from feedback
-                "change_active_users": "+12.5%",
-                "change_messages": "+8.2%",
-                "change_response_time": "-0.3s",
+                "change_active_users": usage_stats["change_active_users"],
+                "change_messages": usage_stats["change_messages"],
+                "change_response_time": latency_stats["change_response_time"],
                 "change_accuracy": "+2.1%",
                 "total_documents": milvus_stats.get("total_documents", 804),
                 "vector_embeddings": f"{milvus_stats.get('total_documents', 804) * 15:.1f}K",
@@ -35,33 +44,54 @@ class DashboardService:
             logger.error(f"Error getting system metrics: {e}")
             return self._get_default_metrics()
     
-    async def _get_redis_stats(self) -> Dict[str, Any]:
-        """Get Redis-based statistics"""
+    async def _get_usage_stats(self) -> Dict[str, Any]:
+        """Messages and active users over the last 24h from the write-path counters"""
         try:
             client = await get_redis_client()
+            usage = await usage_counters.get_daily_summary(client)
+            
+            return {
+                "active_users": usage["active_users"],
+                "messages_today": usage["messages"],
+                "change_active_users": percent_change(usage["active_users"], usage["previous_active_users"]),
+                "change_messages": percent_change(usage["messages"], usage["previous_messages"])
+            }
             
-            # Count conversation keys to estimate active users
-            keys = await client.keys("conversation:*")
-            active_users = len(keys)
+        except Exception as e:
+            logger.error(f"Error getting usage stats: {e}")
+            return {"active_users": 0, "messages_today": 0, "change_active_users": "0%", "change_messages": "0%"}
+    
+    async def _get_latency_stats(self) -> Dict[str, Any]:
+        """Reply latency over the last 24h and its change from the 24h before"""
+        try:
+            now = datetime.now().timestamp()
+            current = await response_latency_sketch.summarize(DAY_SECONDS, end=now)
+            previous = await response_latency_sketch.summarize(DAY_SECONDS, end=now - DAY_SECONDS)
             
-            # Estimate messages from conversation lengths
-            messages_today = 0
-            for key in keys[:100]:  # Sample first 100 to avoid performance issues
-                length = await client.llen(key)
-                messages_today += length
+            change = "0s"
+            if current["mean"] is not None and previous["mean"] is not None:
+                change = f"{current['mean'] - previous['mean']:+.1f}s"
             
-            # Extrapolate if we sampled
-            if len(keys) > 100:
-                messages_today = int(messages_today * (len(keys) / 100))
+            def seconds(value):
+                return round(value, 2) if value is not None else 0
             
             return {
-                "active_users": active_users,
-                "messages_today": messages_today
+                "avg_response_time": seconds(current["mean"]),
+                "p50_response_time": seconds(current["p50"]),
+                "p95_response_time": seconds(current["p95"]),
+                "p99_response_time": seconds(current["p99"]),
+                "change_response_time": change
             }
             
         except Exception as e:
-            logger.error(f"Error getting Redis stats: {e}")
-            return {"active_users": 0, "messages_today": 0}
+            logger.error(f"Error getting latency stats: {e}")
+            return {
+                "avg_response_time": 0,
+                "p50_response_time": 0,
+                "p95_response_time": 0,
+                "p99_response_time": 0,
+                "change_response_time": "0s"
+            }
     
     async def _get_milvus_stats(self) -> Dict[str, Any]:
         """Get Milvus vector database statistics"""
@@ -89,66 +119,20 @@ class DashboardService:
             "last_sync": "2h ago"
         }
     
-    async def get_system_health(self) -> List[Dict[str, str]]:
-        """Get system health status"""
-        services = []
-        
-        # Check Redis
-        try:
-            client = await get_redis_client()
-            await client.ping()
-            services.append({
-                "service": "Redis Cache",
-                "status": "healthy",
-                "uptime": "100%"
-            })
-        except Exception:
-            services.append({
-                "service": "Redis Cache",
-                "status": "error",
-                "uptime": "0%"
-            })
-        
-        # Check Milvus
-        try:
-            await vector_store.get_collection_stats()
-            services.append({
-                "service": "Milvus Vector DB",
-                "status": "healthy",
-                "uptime": "98.2%"
-            })
-        except Exception:
-            services.append({
-                "service": "Milvus Vector DB",
-                "status": "error",
-                "uptime": "0%"
-            })
-        
-        # Add other services (these would be real checks in production)
-        services.extend([
-            {"service": "Telegram API", "status": "healthy", "uptime": "99.9%"},
-            {"service": "LLM Service", "status": "healthy", "uptime": "99.7%"},
-            {"service": "Reranker API", "status": "healthy", "uptime": "99.5%"}
-        ])
-        
-        return services
+    async def get_system_health(self) -> List[Dict[str, Any]]:
+        """Get system health status from the background prober"""
+        return health_prober.get_system_status()
     
-    async def get_activity_data(self) -> List[Dict[str, Any]]:
-        """Get activity data for charts"""
-        # Generate sample data for the last 24 hours
-        now = datetime.now()
-        data = []
-        
-        for i in range(24):
-            timestamp = now - timedelta(hours=i)
-            data.append({
-                "timestamp": timestamp.isoformat(),
-                "messages": random.randint(50, 200),
-                "users": random.randint(20, 80),
-                "response_time": round(random.uniform(0.8, 2.5), 2)
-            })
-        
-        return data[::-1]  # Reverse to get chronological order
+    async def get_activity_data(self, hours: int = 24, resolution: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get activity data for charts from the precomputed rollups"""
+        series = await activity_rollups.get_series(hours * 3600, resolution)
+        for point in series:
+            point["timestamp"] = datetime.fromtimestamp(point["timestamp"]).isoformat()
+        return series
+
+def activity_cache_key(hours: int, resolution: Optional[str] = None) -> Tuple[str, int, str]:
+    """Cache key for an activity series, using the resolution it will actually be read at"""
+    return ("activity", hours, activity_rollups.resolve(hours * 3600, resolution)[0])
 
 # Global instance
 dashboard_service = DashboardService()
\ No newline at end of file
@@ -1,7 +1,9 @@
 from sentence_transformers import SentenceTransformer
-from typing import List, Union
+from typing import List, Union, Optional
 from loguru import logger
 from utils.config import settings
+from .resilience import Deadline
+import asyncio
 import numpy as np
 
 class EmbeddingService:
@@ -20,14 +22,22 @@ class EmbeddingService:
             logger.error(f"Error loading embedding model: {e}")
             raise
     
-    async def embed_text(self, text: str) -> List[float]:
+    async def embed_text(self, text: str, deadline: Optional[Deadline] = None) -> List[float]:
         """Generate embedding for a single text"""
         if self.model is None:
             await self.initialize()
         
         try:
-            embedding = self.model.encode(text, convert_to_tensor=False)
+            # Encoding is CPU-bound, keep it off the event loop
+            encoding = asyncio.to_thread(self.model.encode, text, convert_to_tensor=False)
+            if deadline is None:
+                embedding = await encoding
+            else:
+                embedding = await asyncio.wait_for(encoding, timeout=deadline.remaining())
             return embedding.tolist()
+        except asyncio.TimeoutError:
+            logger.warning("Embedding skipped, message deadline exceeded")
+            return []
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             return []
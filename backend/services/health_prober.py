@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from utils.config import settings
+from .redis_client import get_redis_client
+from .milvus_client import vector_store
+from .http_client import http_clients
+from .llm_balancer import llm_balancer
+from .metrics import DEPENDENCY_LATENCY
+
+class ProbeUnhealthy(Exception):
+    """Raised by a check that reached its dependency but got a bad answer"""
+
+class ProbeState:
+    """Last result and rolling availability of one dependency"""
+
+    def __init__(self, name: str, display_name: str, window: int):
+        self.name = name
+        self.display_name = display_name
+        self.status = "unknown"
+        self.latency: Optional[float] = None
+        self.last_checked: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.results = deque(maxlen=window)
+
+    def record(self, ok: bool, latency: float, error: Optional[str] = None):
+        self.results.append(ok)
+        self.latency = latency
+        self.last_checked = time.time()
+        self.last_error = error
+        if not ok:
+            self.status = "error"
+        elif error or latency > settings.HEALTH_PROBE_SLOW_SECONDS:
+            self.status = "warning"
+        else:
+            self.status = "healthy"
+
+    @property
+    def availability(self) -> Optional[float]:
+        """Percentage of successful probes in the window"""
+        if not self.results:
+            return None
+        return sum(self.results) / len(self.results) * 100
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "latency_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "availability": round(self.availability, 2) if self.availability is not None else None,
+            "last_checked": datetime.fromtimestamp(self.last_checked).isoformat() if self.last_checked else None,
+            "last_error": self.last_error
+        }
+
+class HealthProber:
+    """Check every dependency in the background so health endpoints only read cached state"""
+
+    def __init__(self, interval: float, timeout: float, window: int):
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self._checks: List[Tuple[ProbeState, Callable[[], Awaitable[Optional[str]]]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, display_name: str, check: Callable[[], Awaitable[Optional[str]]]):
+        """Add a check; it raises when unhealthy and may return a note to report it as degraded"""
+        self._checks.append((ProbeState(name, display_name, self.window), check))
+
+    def start(self):
+        """Start probing in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await self.probe_all()
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def probe_all(self):
+        """Run all checks concurrently, each bounded by the probe timeout"""
+        await asyncio.gather(*(self._probe(state, check) for state, check in self._checks))
+
+    async def _probe(self, state: ProbeState, check: Callable[[], Awaitable[Optional[str]]]):
+        started = time.perf_counter()
+        try:
+            note = await asyncio.wait_for(check(), timeout=self.timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            state.record(False, time.perf_counter() - started, f"timed out after {self.timeout:g}s")
+        except Exception as e:
+            state.record(False, time.perf_counter() - started, str(e) or type(e).__name__)
+        else:
+            state.record(True, time.perf_counter() - started, note)
+        DEPENDENCY_LATENCY.labels(dependency=state.name, operation="health_probe").observe(state.latency)
+        if state.status == "error":
+            logger.warning(f"Health probe for {state.name} failed: {state.last_error}")
+
+    def get_services(self) -> Dict[str, str]:
+        """Status per dependency, in the healthy/unhealthy terms /health has always used"""
+        return {
+            state.name: "unhealthy" if state.status == "error" else state.status
+            for state, _ in self._checks
+        }
+
+    def get_details(self) -> Dict[str, Dict[str, Any]]:
+        return {state.name: state.get_stats() for state, _ in self._checks}
+
+    def get_availability(self) -> Optional[float]:
+        """Availability of the least available dependency, which bounds the bot's own"""
+        availabilities = [state.availability for state, _ in self._checks if state.availability is not None]
+        return min(availabilities) if availabilities else None
+
+    def get_system_status(self) -> List[Dict[str, Any]]:
+        """Rows for the dashboard system status panel"""
+        rows = []
+        for state, _ in self._checks:
+            availability = state.availability
+            stats = state.get_stats()
+            rows.append({
+                "service": state.display_name,
+                # Not probed yet; the panel only knows healthy, warning and error
+                "status": state.status if state.status != "unknown" else "warning",
+                "uptime": f"{availability:.1f}%" if availability is not None else "n/a",
+                "latency_ms": stats["latency_ms"],
+                "last_checked": stats["last_checked"]
+            })
+        return rows
+
+async def check_redis():
+    client = await get_redis_client()
+    await client.ping()
+
+async def check_milvus():
+    await vector_store.ping(timeout=settings.HEALTH_PROBE_TIMEOUT)
+
+async def _check_reachable(client_name: str, url: str):
+    """Any non-5xx answer means the server is up; probes must not spend tokens"""
+    response = await http_clients.get(client_name).get(url, timeout=settings.HEALTH_PROBE_TIMEOUT)
+    if response.status_code >= 500:
+        raise ProbeUnhealthy(f"HTTP {response.status_code}")
+
+async def check_llm():
+    backends = llm_balancer.backends
+    if not backends:
+        raise ProbeUnhealthy("no LLM endpoint configured")
+    results = await asyncio.gather(
+        *(_check_reachable("llm", backend.url) for backend in backends),
+        return_exceptions=True
+    )
+    failed = [str(result) for result in results if isinstance(result, Exception)]
+    if len(failed) == len(backends):
+        raise ProbeUnhealthy("; ".join(failed))
+    if failed:
+        return f"{len(failed)} of {len(backends)} replicas unreachable"
+
+async def check_reranker():
+    await _check_reachable("reranker", settings.RERANKER_API_URL)
+
+async def check_telegram():
+    if not settings.TELEGRAM_BOT_TOKEN:
+        raise ProbeUnhealthy("bot token not configured")
+    try:
+        response = await http_clients.get("telegram").get(
+            f"/bot{settings.TELEGRAM_BOT_TOKEN}/getMe",
+            timeout=settings.HEALTH_PROBE_TIMEOUT
+        )
+    except Exception as e:
+        # Transport errors can carry the request URL, which contains the bot token
+        raise ProbeUnhealthy(type(e).__name__)
+    if response.status_code != 200 or not response.json().get("ok"):
+        raise ProbeUnhealthy(f"getMe returned HTTP {response.status_code}")
+
+# Global instance
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL,
+    timeout=settings.HEALTH_PROBE_TIMEOUT,
+    window=settings.HEALTH_PROBE_WINDOW
+)
+health_prober.register("redis", "Redis Cache", check_redis)
+health_prober.register("milvus", "Milvus Vector DB", check_milvus)
+health_prober.register("telegram", "Telegram API", check_telegram)
+health_prober.register("llm", "LLM Service", check_llm)
+health_prober.register("reranker", "Reranker API", check_reranker)
@@ -0,0 +1,147 @@
+import httpx
+import time
+from typing import Dict, Any, Optional
+from loguru import logger
+from utils.config import settings
+from .metrics import HTTP_REQUEST_LATENCY
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+class HTTPClientRegistry:
+    """Shared, pooled httpx clients keyed by outbound destination"""
+
+    def __init__(self):
+        self._configs: Dict[str, Dict[str, Any]] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def register(
+        self,
+        name: str,
+        base_url: str = "",
+        timeout: float = 30.0,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Register connection settings for a destination"""
+        self._configs[name] = {
+            "base_url": base_url,
+            "timeout": timeout,
+            "max_connections": max_connections or settings.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "headers": headers or {}
+        }
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Get the pooled client for a destination, creating it on first use"""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create_client(name)
+            self._clients[name] = client
+        return client
+
+    def _create_client(self, name: str) -> httpx.AsyncClient:
+        """Build a client from the registered destination settings"""
+        if name not in self._configs:
+            raise KeyError(f"HTTP destination '{name}' is not registered")
+
+        config = self._configs[name]
+        http2 = settings.HTTP2_ENABLED
+        if http2 and not _http2_available():
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        )
+
+        logger.info(
+            f"Creating HTTP client '{name}' "
+            f"(max_connections={config['max_connections']}, http2={http2})"
+        )
+        return httpx.AsyncClient(
+            base_url=config["base_url"],
+            timeout=config["timeout"],
+            limits=limits,
+            headers=config["headers"],
+            http2=http2,
+            event_hooks=self._latency_hooks(name)
+        )
+
+    @staticmethod
+    def _latency_hooks(name: str) -> Dict[str, Any]:
+        """httpx event hooks recording time to response headers per destination"""
+        async def on_request(request: httpx.Request):
+            request.extensions["started_at"] = time.perf_counter()
+
+        async def on_response(response: httpx.Response):
+            started = response.request.extensions.get("started_at")
+            if started is not None:
+                HTTP_REQUEST_LATENCY.labels(
+                    destination=name,
+                    status=str(response.status_code)
+                ).observe(time.perf_counter() - started)
+
+        return {"request": [on_request], "response": [on_response]}
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get connection pool utilization per destination"""
+        stats = {}
+        for name, config in self._configs.items():
+            client = self._clients.get(name)
+            connections = []
+            if client is not None and not client.is_closed:
+                # httpx does not expose pool state publicly, so read it defensively
+                pool = getattr(client._transport, "_pool", None)
+                connections = list(getattr(pool, "connections", []))
+
+            active = sum(1 for conn in connections if not conn.is_idle())
+            stats[name] = {
+                "open_connections": len(connections),
+                "active_connections": active,
+                "idle_connections": len(connections) - active,
+                "max_connections": config["max_connections"],
+                "utilization": round(active / config["max_connections"], 4)
+            }
+        return stats
+
+    async def aclose(self):
+        """Close every open client"""
+        for name, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client '{name}': {e}")
+        self._clients.clear()
+
+# Global instance
+http_clients = HTTPClientRegistry()
+
+http_clients.register(
+    "telegram",
+    base_url=settings.TELEGRAM_API_BASE_URL,
+    timeout=30.0,
+    max_connections=settings.TELEGRAM_HTTP_MAX_CONNECTIONS
+)
+http_clients.register(
+    "llm",
+    timeout=30.0,
+    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS
+)
+http_clients.register(
+    "reranker",
+    timeout=10.0
+)
+http_clients.register(
+    "scraping",
+    timeout=30.0,
+    headers={"User-Agent": settings.USER_AGENT}
+)
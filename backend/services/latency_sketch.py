@@ -0,0 +1,113 @@
+import math
+import time
+from typing import Dict, Any, List, Optional
+from loguru import logger
+from utils.config import settings
+from .redis_client import get_redis_client
+
+class LatencySketch:
+    """Mergeable log-bucketed latency histogram stored in Redis per time bucket"""
+
+    # Values map to bucket ceil(log_gamma(v)), so quantiles read back are within
+    # relative_accuracy of the truth, and sketches from every worker and time
+    # slice merge by adding counts.
+
+    MIN_VALUE = 1e-4  # 0.1 ms; anything faster lands in the lowest bucket
+
+    def __init__(
+        self,
+        prefix: str = "latency_sketch",
+        relative_accuracy: float = 0.01,
+        bucket_seconds: int = 3600,
+        retention_seconds: int = 8 * 24 * 3600
+    ):
+        self.prefix = prefix
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bucket_seconds = bucket_seconds
+        self.retention_seconds = retention_seconds
+
+    def _key(self, bucket_start: int) -> str:
+        return f"{self.prefix}:{bucket_start}"
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(max(value, self.MIN_VALUE)) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # Midpoint of (gamma^(i-1), gamma^i] with bounded relative error
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    async def record(self, latency: float, now: Optional[float] = None):
+        """Add one latency sample (seconds) to the current time bucket"""
+        try:
+            now = time.time() if now is None else now
+            bucket_start = int(now) - int(now) % self.bucket_seconds
+            key = self._key(bucket_start)
+
+            client = await get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(key, str(self._index(latency)), 1)
+            pipe.hincrby(key, "count", 1)
+            pipe.hincrbyfloat(key, "sum", latency)
+            pipe.expire(key, self.retention_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording latency sample: {e}")
+
+    async def summarize(self, window_seconds: int, end: Optional[float] = None) -> Dict[str, Any]:
+        """Merge the buckets covering [end - window, end) and read off quantiles"""
+        end = time.time() if end is None else end
+        last_bucket = int(end) - int(end) % self.bucket_seconds
+        bucket_count = max(1, window_seconds // self.bucket_seconds)
+        keys = [
+            self._key(last_bucket - i * self.bucket_seconds)
+            for i in range(bucket_count)
+        ]
+
+        client = await get_redis_client()
+        pipe = client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        return self._merge(await pipe.execute())
+
+    def _merge(self, buckets: List[Dict[str, str]]) -> Dict[str, Any]:
+        counts: Dict[int, int] = {}
+        total = 0
+        latency_sum = 0.0
+        for bucket in buckets:
+            for field, value in bucket.items():
+                if field == "count":
+                    total += int(value)
+                elif field == "sum":
+                    latency_sum += float(value)
+                else:
+                    index = int(field)
+                    counts[index] = counts.get(index, 0) + int(value)
+
+        if total == 0:
+            return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None}
+
+        ordered = sorted(counts.items())
+        return {
+            "count": total,
+            "mean": latency_sum / total,
+            "p50": self._quantile(ordered, total, 0.50),
+            "p95": self._quantile(ordered, total, 0.95),
+            "p99": self._quantile(ordered, total, 0.99)
+        }
+
+    def _quantile(self, ordered: List[tuple], total: int, q: float) -> float:
+        rank = q * (total - 1)
+        seen = 0
+        for index, count in ordered:
+            seen += count
+            if seen > rank:
+                return self._value(index)
+        return self._value(ordered[-1][0])
+
+# Global instance
+response_latency_sketch = LatencySketch(
+    prefix="latency_sketch:reply",
+    relative_accuracy=settings.LATENCY_SKETCH_ACCURACY,
+    bucket_seconds=settings.LATENCY_SKETCH_BUCKET_SECONDS
+)
@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from loguru import logger
+from utils.config import settings
+from .llm_scheduler import llm_scheduler
+
+class LLMBackend:
+    """Routing state for a single inference replica"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewma_latency_ms": round(self.ewma_latency * 1000, 2) if self.ewma_latency is not None else None,
+            "requests": self.requests,
+            "failures": self.failures
+        }
+
+class LLMLoadBalancer:
+    """Spread LLM requests across replicas with ejection and optional hedging"""
+
+    EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        strategy: str = "least_outstanding",
+        failure_threshold: int = 3,
+        ejection_seconds: float = 30.0,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 50
+    ):
+        self.backends = [LLMBackend(url) for url in urls]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_seconds = ejection_seconds
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = deque(maxlen=1000)
+        self.hedged_requests = 0
+        self.hedge_wins = 0
+
+    def pick(self, exclude: Sequence[LLMBackend] = ()) -> Optional[LLMBackend]:
+        """Choose the least loaded healthy replica"""
+        candidates = [b for b in self.backends if b not in exclude]
+        healthy = [b for b in candidates if b.healthy]
+        # Fail open: if every replica is ejected, still try the least loaded one
+        pool = healthy or candidates
+        if not pool:
+            return None
+
+        if self.strategy == "ewma":
+            return min(pool, key=lambda b: (b.ewma_latency or 0.0) * (b.outstanding + 1))
+        return min(pool, key=lambda b: (b.outstanding, b.ewma_latency or 0.0))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Latency after which a second replica is tried, or None when hedging is off"""
+        if not self.hedge_enabled or len(self.backends) < 2:
+            return None
+        if len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def request(self, send: Callable[[LLMBackend], Awaitable[Any]]) -> Any:
+        """Run send() against a routed replica, hedging to a second one if it is slow"""
+        primary = self.pick()
+        if primary is None:
+            raise Exception("No LLM backends configured")
+
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._call(primary, send)
+
+        primary_task = asyncio.create_task(self._call(primary, send))
+        pending = {primary_task}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary_task.result()
+
+            secondary = self.pick(exclude=[primary])
+            # The hedge needs its own scheduler slot, so hedging never pushes the
+            # replicas past LLM_MAX_CONCURRENCY; under load it is simply skipped
+            if secondary is None or not llm_scheduler.try_acquire():
+                return await primary_task
+
+            self.hedged_requests += 1
+            logger.debug(f"Hedging LLM request from {primary.url} to {secondary.url} after {delay:.2f}s")
+            secondary_task = asyncio.create_task(self._call(secondary, send))
+            secondary_task.add_done_callback(lambda _: llm_scheduler.release())
+            pending = {primary_task, secondary_task}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary_task:
+                            self.hedge_wins += 1
+                        return task.result()
+            # Both attempts failed, surface the primary's error
+            return primary_task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _call(self, backend: LLMBackend, send: Callable[[LLMBackend], Awaitable[Any]]) -> Any:
+        """Send to one replica while tracking outstanding requests and health"""
+        backend.outstanding += 1
+        backend.requests += 1
+        started = time.monotonic()
+        try:
+            result = await send(backend)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._record_failure(backend)
+            raise
+        else:
+            self._record_success(backend, time.monotonic() - started)
+            return result
+        finally:
+            backend.outstanding -= 1
+
+    def _record_success(self, backend: LLMBackend, latency: float):
+        backend.consecutive_failures = 0
+        if backend.ewma_latency is None:
+            backend.ewma_latency = latency
+        else:
+            backend.ewma_latency = self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * backend.ewma_latency
+        self._latencies.append(latency)
+
+    def _record_failure(self, backend: LLMBackend):
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.failure_threshold:
+            backend.ejected_until = time.monotonic() + self.ejection_seconds
+            backend.consecutive_failures = 0
+            logger.warning(f"Ejecting LLM backend {backend.url} for {self.ejection_seconds}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-replica routing statistics"""
+        return {
+            "strategy": self.strategy,
+            "hedged_requests": self.hedged_requests,
+            "hedge_wins": self.hedge_wins,
+            "backends": [backend.get_stats() for backend in self.backends]
+        }
+
+def configured_llm_urls() -> List[str]:
+    """LLM replica URLs from LLM_API_URLS, falling back to LLM_API_URL"""
+    urls = [url.strip() for url in settings.LLM_API_URLS.split(",") if url.strip()]
+    if not urls and settings.LLM_API_URL:
+        urls = [settings.LLM_API_URL]
+    return urls
+
+# Global instance
+llm_balancer = LLMLoadBalancer(
+    configured_llm_urls(),
+    strategy=settings.LLM_ROUTING_STRATEGY,
+    failure_threshold=settings.LLM_EJECTION_FAILURES,
+    ejection_seconds=settings.LLM_EJECTION_SECONDS,
+    hedge_enabled=settings.LLM_HEDGE_ENABLED,
+    hedge_percentile=settings.LLM_HEDGE_PERCENTILE
+)
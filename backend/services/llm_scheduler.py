@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Dict, Any, List, Optional, Tuple
+from utils.config import settings
+from .metrics import QUEUE_DEPTH
+
+class Priority(IntEnum):
+    """Scheduling classes, lower values are served first"""
+    INTERACTIVE = 0
+    BATCH = 1
+
+class SchedulerRejected(Exception):
+    """Raised when a request cannot get an LLM slot in time"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class LLMScheduler:
+    """Bounded-concurrency priority scheduler in front of the LLM endpoint"""
+
+    def __init__(self, max_concurrency: int, max_queue_size: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+        self._active = 0
+        self._queued = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wait_times = {priority: deque(maxlen=1000) for priority in Priority}
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE, timeout: Optional[float] = None):
+        """Hold one of the concurrency slots for the duration of the block"""
+        await self._acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: Priority, timeout: Optional[float]):
+        """Wait for a free slot, respecting priority, queue bound and deadline"""
+        started = time.monotonic()
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._record_admission(priority, started)
+            return
+
+        if self._queued >= self.max_queue_size:
+            self.rejected_queue_full += 1
+            raise SchedulerRejected("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+        self._queued += 1
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._queued -= 1
+            self.rejected_timeout += 1
+            raise SchedulerRejected("queue_timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before we were cancelled
+                self._release()
+            else:
+                self._queued -= 1
+            raise
+        self._record_admission(priority, started)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now, for optional extra work like hedging"""
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            return True
+        return False
+
+    def release(self):
+        """Give back a slot taken with try_acquire"""
+        self._release()
+
+    def _release(self):
+        """Hand the slot to the highest-priority live waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _record_admission(self, priority: Priority, started: float):
+        """Record how long a request waited for its slot"""
+        self.admitted += 1
+        self._wait_times[priority].append(time.monotonic() - started)
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler utilization and queue-time statistics"""
+        queue_times = {}
+        for priority, samples in self._wait_times.items():
+            ordered = sorted(samples)
+            queue_times[priority.name.lower()] = {
+                "samples": len(ordered),
+                "avg_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+                "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 2) if ordered else 0.0,
+                "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0
+            }
+
+        return {
+            "active": self._active,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue_size": self.max_queue_size,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "queue_times": queue_times
+        }
+
+def queue_timeout_for(priority: Priority) -> Optional[float]:
+    """Configured queue deadline for a priority class"""
+    if priority == Priority.INTERACTIVE:
+        return settings.LLM_QUEUE_TIMEOUT
+    return settings.LLM_BATCH_QUEUE_TIMEOUT
+
+# Global instance
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    max_queue_size=settings.LLM_MAX_QUEUE_SIZE
+)
+QUEUE_DEPTH.labels(queue="llm").set_function(lambda: llm_scheduler.queued)
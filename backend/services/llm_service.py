@@ -2,55 +2,144 @@ import httpx
 from typing import List, Dict, Any, Optional
 from loguru import logger
 from utils.config import settings
+from .http_client import http_clients
+from .llm_balancer import llm_balancer
+from .llm_scheduler import llm_scheduler, Priority, SchedulerRejected, queue_timeout_for
+from .resilience import Deadline, llm_breaker, stage_timeout, cut_short_by_deadline
+
+LLM_TIMEOUT = 30.0
+OVERLOADED_REPLY = "I'm receiving a lot of questions right now. Please try again in a moment."
+ERROR_REPLY = "I apologize, but I'm having trouble processing your request right now. Please try again later."
+
+class LLMUnavailable(Exception):
+    """Raised when the LLM circuit breaker is rejecting requests"""
 
 class LLMService:
     """Service for interacting with the self-hosted LLM"""
     
     def __init__(self):
-        self.api_url = settings.LLM_API_URL
+        self.balancer = llm_balancer
         self.api_key = settings.LLM_API_KEY
-        self.client = httpx.AsyncClient(timeout=30.0)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client for the LLM endpoint"""
+        return http_clients.get("llm")
     
     async def generate_response(
         self,
         user_query: str,
         conversation_history: List[Dict[str, Any]],
-        rag_context: str
+        rag_context: str,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: Optional[Deadline] = None,
+        conversation_summary: Optional[str] = None
     ) -> str:
         """Generate response using LLM with conversation history and RAG context"""
+        if deadline is not None and deadline.exhausted:
+            logger.warning("Skipping LLM call, message deadline exceeded")
+            return ERROR_REPLY
+        
         try:
             # Prepare the prompt
             system_prompt = self._build_system_prompt(rag_context)
-            messages = self._build_messages(system_prompt, conversation_history, user_query)
+            messages = self._build_messages(system_prompt, conversation_history, user_query, conversation_summary)
             
-            # Make API call to LLM
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {self.api_key}" if self.api_key else None
-            }
-            headers = {k: v for k, v in headers.items() if v is not None}
-            
-            payload = {
-                "model": "your-model-name",  # Configure based on your LLM setup
-                "messages": messages,
-                "max_tokens": 1000,
-                "temperature": 0.7,
-                "stream": False
-            }
+            return await self._complete(messages, 1000, 0.7, priority, deadline)
             
+        except SchedulerRejected as e:
+            logger.warning(f"LLM request shed by scheduler ({e.reason}, priority={priority.name})")
+            return OVERLOADED_REPLY
+        except LLMUnavailable:
+            logger.warning("LLM circuit open, returning fallback reply")
+            return ERROR_REPLY
+        except Exception as e:
+            logger.error(f"Error generating LLM response: {e}")
+            return ERROR_REPLY
+    
+    async def summarize_conversation(
+        self,
+        previous_summary: Optional[str],
+        turns: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Fold turns (oldest first) into the running conversation summary, None on failure"""
+        transcript = "\n".join(
+            f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in turns
+        )
+        prompt = f"""Update the summary of a conversation between a user and a Telegram assistant.
+
+Current summary:
+{previous_summary or "(none)"}
+
+New messages:
+{transcript}
+
+Write the updated summary in at most {settings.CONVERSATION_SUMMARY_MAX_TOKENS // 2} words. Keep facts about the user, their questions and the answers they were given. Reply with the summary only."""
+        
+        try:
+            summary = await self._complete(
+                [{"role": "user", "content": prompt}],
+                settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+                0.2,
+                Priority.BATCH
+            )
+            return summary.strip() or None
+        except Exception as e:
+            logger.warning(f"Conversation summary update failed: {e}")
+            return None
+    
+    async def _complete(
+        self,
+        messages: List[Dict[str, str]],
+        max_tokens: int,
+        temperature: float,
+        priority: Priority,
+        deadline: Optional[Deadline] = None
+    ) -> str:
+        """Run one chat completion through the scheduler, circuit breaker and balancer"""
+        # Make API call to LLM
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}" if self.api_key else None
+        }
+        headers = {k: v for k, v in headers.items() if v is not None}
+        
+        payload = {
+            "model": "your-model-name",  # Configure based on your LLM setup
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": False
+        }
+        
+        async def send(backend):
             response = await self.client.post(
-                self.api_url,
+                backend.url,
                 json=payload,
-                headers=headers
+                headers=headers,
+                timeout=stage_timeout(deadline, LLM_TIMEOUT)
             )
             response.raise_for_status()
-            
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
-            
-        except Exception as e:
-            logger.error(f"Error generating LLM response: {e}")
-            return "I apologize, but I'm having trouble processing your request right now. Please try again later."
+            return response.json()
+        
+        # Fail fast on an open circuit instead of waiting in the LLM queue first
+        if not llm_breaker.allow_request():
+            raise LLMUnavailable("circuit_open")
+        queue_timeout = stage_timeout(deadline, queue_timeout_for(priority))
+        async with llm_scheduler.slot(priority, timeout=queue_timeout):
+            # The circuit may have opened while this request was queued
+            if llm_breaker.state == llm_breaker.OPEN:
+                raise LLMUnavailable("circuit_open")
+            try:
+                result = await self.balancer.request(send)
+                content = result["choices"][0]["message"]["content"]
+            except Exception as e:
+                if not cut_short_by_deadline(e, deadline):
+                    llm_breaker.record_failure()
+                raise
+            llm_breaker.record_success()
+        
+        return content
     
     def _build_system_prompt(self, rag_context: str) -> str:
         """Build system prompt with RAG context"""
@@ -70,22 +159,38 @@ Instructions:
         self,
         system_prompt: str,
         conversation_history: List[Dict[str, Any]],
-        user_query: str
+        user_query: str,
+        conversation_summary: Optional[str] = None
     ) -> List[Dict[str, str]]:
-        """Build message array for LLM API"""
+        """Build message array for LLM API, packing summary and recent turns into the token budget"""
         messages = [{"role": "system", "content": system_prompt}]
+        budget = settings.CONVERSATION_PROMPT_TOKEN_BUDGET
+        
+        # Older turns folded into the rolling summary
+        if conversation_summary:
+            summary_content = f"Summary of the earlier conversation:\n{conversation_summary}"
+            budget -= estimate_tokens(summary_content)
+            messages.append({"role": "system", "content": summary_content})
         
-        # Add conversation history (last 5 messages)
-        for msg in reversed(conversation_history[-settings.MAX_CONVERSATION_HISTORY:]):
-            messages.append({
-                "role": msg.get("role", "user"),
-                "content": msg.get("content", "")
-            })
+        # History is newest first; keep the most recent turns that fit
+        recent = []
+        for msg in conversation_history:
+            content = msg.get("content", "")
+            cost = estimate_tokens(content)
+            if cost > budget:
+                break
+            budget -= cost
+            recent.append({"role": msg.get("role", "user"), "content": content})
+        messages.extend(reversed(recent))
         
         # Add current user query
         messages.append({"role": "user", "content": user_query})
         
         return messages
+    
+def estimate_tokens(text: str) -> int:
+    """Rough token count, about four characters per token"""
+    return len(text) // 4 + 1
 
 # Global instance
 llm_service = LLMService()
\ No newline at end of file
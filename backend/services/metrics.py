@@ -0,0 +1,97 @@
+import functools
+import time
+from typing import Any, Callable
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+MESSAGE_LATENCY = Histogram(
+    "rag_message_latency_seconds",
+    "End-to-end time from picking up a Telegram message to queueing the reply",
+    buckets=LATENCY_BUCKETS
+)
+PIPELINE_STAGE_LATENCY = Histogram(
+    "rag_pipeline_stage_seconds",
+    "Duration of each process_message stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+DEPENDENCY_LATENCY = Histogram(
+    "rag_dependency_call_seconds",
+    "Latency of calls to Redis and Milvus",
+    ["dependency", "operation"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUEST_LATENCY = Histogram(
+    "rag_http_request_seconds",
+    "Time to response headers for outbound HTTP requests",
+    ["destination", "status"],
+    buckets=LATENCY_BUCKETS
+)
+QUEUE_DEPTH = Gauge(
+    "rag_queue_depth",
+    "Items waiting in internal queues",
+    ["queue"]
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "rag_redis_pool_connections",
+    "Redis pool connections by state",
+    ["pool", "state"]
+)
+CACHE_REQUESTS = Counter(
+    "rag_cache_requests_total",
+    "Cache and coalescing lookups by outcome",
+    ["cache", "result"]
+)
+TELEGRAM_UPDATES = Counter(
+    "rag_telegram_updates_total",
+    "Incoming Telegram updates by outcome",
+    ["status"]
+)
+
+class LatencyTracker:
+    """Observe elapsed time into a histogram, as a context manager or async decorator"""
+
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, histogram: Histogram, **labels: str):
+        self._child = histogram.labels(**labels) if labels else histogram
+        self._started = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        child = self._child
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+
+        return wrapper
+
+def track_stage(stage: str) -> LatencyTracker:
+    """Time a process_message stage"""
+    return LatencyTracker(PIPELINE_STAGE_LATENCY, stage=stage)
+
+def track_dependency(dependency: str, operation: str) -> LatencyTracker:
+    """Time a Redis or Milvus call"""
+    return LatencyTracker(DEPENDENCY_LATENCY, dependency=dependency, operation=operation)
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+def render_metrics() -> bytes:
+    """Serialize all metrics in the Prometheus text format"""
+    return generate_latest()
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
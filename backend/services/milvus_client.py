@@ -1,7 +1,10 @@
 from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 from utils.config import settings
+from .resilience import Deadline, milvus_breaker, cut_short_by_deadline
+from .metrics import track_dependency
+import asyncio
 import time
 
 milvus_client = None
@@ -77,6 +80,7 @@ class VectorStore:
     def __init__(self):
         self.collection_name = COLLECTION_NAME
     
+    @track_dependency("milvus", "insert")
     async def insert_documents(self, documents: List[Dict[str, Any]]):
         """Insert documents into vector store"""
         try:
@@ -116,8 +120,24 @@ class VectorStore:
             logger.error(f"Error inserting documents: {e}")
             raise
     
-    async def search_similar(self, query_embedding: List[float], top_k: int = 10) -> List[Dict[str, Any]]:
+    @track_dependency("milvus", "search")
+    async def search_similar(
+        self,
+        query_embedding: List[float],
+        top_k: int = 10,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
         """Search for similar documents"""
+        if not query_embedding:
+            return []
+        
+        if deadline is not None and deadline.exhausted:
+            logger.warning("Skipping vector search, message deadline exceeded")
+            return []
+        if not milvus_breaker.allow_request():
+            logger.warning("Milvus circuit open, skipping vector search")
+            return []
+        
         try:
             collection = get_milvus_client()
             
@@ -126,12 +146,18 @@ class VectorStore:
                 "params": {"nprobe": 10}
             }
             
-            results = collection.search(
-                data=[query_embedding],
-                anns_field="embedding",
-                param=search_params,
-                limit=top_k,
-                output_fields=["text", "source_url", "title", "chunk_index"]
+            timeout = deadline.remaining() if deadline is not None else None
+            results = await asyncio.wait_for(
+                asyncio.to_thread(
+                    collection.search,
+                    data=[query_embedding],
+                    anns_field="embedding",
+                    param=search_params,
+                    limit=top_k,
+                    output_fields=["text", "source_url", "title", "chunk_index"],
+                    timeout=timeout
+                ),
+                timeout=timeout
             )
             
             # Format results
@@ -147,12 +173,31 @@ class VectorStore:
                         "chunk_index": hit.entity.get("chunk_index")
                     })
             
+            milvus_breaker.record_success()
             return formatted_results
             
         except Exception as e:
+            if cut_short_by_deadline(e, deadline):
+                logger.warning("Vector search cut short, message deadline exceeded")
+                return []
+            milvus_breaker.record_failure()
             logger.error(f"Error searching similar documents: {e}")
             return []
     
+    async def ping(self, timeout: float = 5.0):
+        """Run a minimal primary-key query, raising if Milvus cannot serve it"""
+        collection = get_milvus_client()
+        await asyncio.wait_for(
+            asyncio.to_thread(
+                collection.query,
+                expr="id >= 0",
+                limit=1,
+                output_fields=["id"],
+                timeout=timeout
+            ),
+            timeout=timeout
+        )
+    
     async def get_collection_stats(self) -> Dict[str, Any]:
         """Get collection statistics"""
         try:
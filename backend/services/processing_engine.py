@@ -0,0 +1,131 @@
+import asyncio
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List
+from loguru import logger
+from utils.config import settings
+from .metrics import QUEUE_DEPTH
+
+_STOP = object()
+
+class ProcessingEngine:
+    """Bounded worker pool that processes each user's messages in order"""
+
+    def __init__(self, workers: int, max_queue_size: int):
+        self.worker_count = workers
+        # Each worker owns one shard so a user's messages never run concurrently
+        self.shard_capacity = max(1, max_queue_size // workers)
+        self._queues: List[asyncio.Queue] = []
+        self._workers: List[asyncio.Task] = []
+        self.accepting = False
+        self.stopping = False
+        self.submitted = 0
+        self.processed = 0
+        self.shed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the worker pool"""
+        if self._workers:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.shard_capacity) for _ in range(self.worker_count)]
+        self._workers = [
+            asyncio.create_task(self._worker(queue)) for queue in self._queues
+        ]
+        self.accepting = True
+        self.stopping = False
+        logger.info(f"Processing engine started with {self.worker_count} workers")
+
+    def submit(self, key: str, handler: Callable[..., Awaitable[Any]], *args: Any) -> bool:
+        """Queue handler(*args) behind earlier work for the same key; False if shed"""
+        if not self._workers and not self.stopping:
+            self.start()
+        if not self.accepting:
+            # Draining for shutdown, or already stopped
+            self.shed += 1
+            logger.warning(f"Processing engine stopping, shedding message for {key}")
+            return False
+
+        shard = zlib.crc32(key.encode("utf-8")) % self.worker_count
+        queue = self._queues[shard]
+        try:
+            if self._workers[shard].done():
+                # Never queue behind a worker that is gone; its users would not be answered
+                logger.error(f"Processing worker {shard} exited unexpectedly, restarting it")
+                self._workers[shard] = asyncio.create_task(self._worker(queue))
+            queue.put_nowait((handler, args))
+        except asyncio.QueueFull:
+            self.shed += 1
+            logger.warning(f"Processing queue full, shedding message for {key}")
+            return False
+        self.submitted += 1
+        return True
+
+    async def stop(self, drain_timeout: float = 30.0):
+        """Stop accepting work and let workers finish what is already queued"""
+        if not self._workers:
+            return
+        self.accepting = False
+        self.stopping = True
+        # The sentinel is queued behind pending work, so it is drained first.
+        # A full shard only takes it once its worker makes room, which has to
+        # happen within the drain timeout like everything else.
+        sentinels = []
+        for queue in self._queues:
+            try:
+                queue.put_nowait(_STOP)
+            except asyncio.QueueFull:
+                sentinels.append(asyncio.create_task(queue.put(_STOP)))
+
+        done, pending = await asyncio.wait(self._workers, timeout=drain_timeout)
+        if pending:
+            logger.warning(f"Processing engine drain timed out, abandoning {self.queue_depth} messages")
+            for task in [*pending, *sentinels]:
+                task.cancel()
+            await asyncio.gather(*pending, *sentinels, return_exceptions=True)
+        self._workers = []
+        self._queues = []
+        logger.info("Processing engine stopped")
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            handler, args = item
+            try:
+                await handler(*args)
+                self.processed += 1
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    # The worker itself is being stopped
+                    raise
+                # Raised out of the handler, e.g. by work it awaited being
+                # cancelled; the rest of the shard must still be served
+                self.failed += 1
+                logger.error("Processing handler was cancelled")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error in processing worker: {e}")
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and throughput statistics"""
+        return {
+            "workers": len(self._workers),
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.shard_capacity * self.worker_count,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "shed": self.shed,
+            "failed": self.failed
+        }
+
+# Global instance
+processing_engine = ProcessingEngine(
+    workers=settings.MESSAGE_WORKERS,
+    max_queue_size=settings.MESSAGE_QUEUE_SIZE
+)
+QUEUE_DEPTH.labels(queue="processing").set_function(lambda: processing_engine.queue_depth)
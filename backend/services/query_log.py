@@ -0,0 +1,85 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Dict, Any, Iterator, List, Optional
+from loguru import logger
+from utils.config import settings
+from .redis_client import get_redis_client
+from .stage_timer import StageTimings
+
+QUERY_LOG_KEY = "query_log"
+
+class QueryLog:
+    """Opt-in sampled log of incoming queries with their stage timings, for replay"""
+
+    def __init__(self, mode: str = "off", sample_rate: float = 0.01, path: str = "", maxlen: int = 100000):
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.path = path
+        self.maxlen = maxlen
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("redis", "file") and self.sample_rate > 0
+
+    async def record(self, user_id: str, text: str, timings: StageTimings, status: str):
+        """Log a finished message if it falls in the sample"""
+        if not self.enabled or random.random() >= self.sample_rate:
+            return
+
+        summary = timings.summary()
+        entry = {
+            # Wall-clock arrival time, so a replay can reproduce the pacing
+            "ts": round(time.time() - timings.elapsed, 3),
+            # Keeps per-user ordering in a replay without storing Telegram ids
+            "user": hashlib.sha1(user_id.encode("utf-8")).hexdigest()[:12],
+            "query": text,
+            "status": status,
+            "total_ms": summary["total_ms"],
+            "stages_ms": summary["stages_ms"]
+        }
+        try:
+            if self.mode == "redis":
+                client = await get_redis_client()
+                await client.xadd(
+                    QUERY_LOG_KEY,
+                    {"entry": json.dumps(entry)},
+                    maxlen=self.maxlen,
+                    approximate=True
+                )
+            else:
+                await asyncio.to_thread(self._append_line, json.dumps(entry))
+            self.recorded += 1
+        except Exception as e:
+            logger.error(f"Error writing query log entry: {e}")
+
+    def _append_line(self, line: str):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+def read_query_log_file(path: str) -> Iterator[Dict[str, Any]]:
+    """Entries of a file query log, in the order they were written"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+async def read_query_log_stream(client, count: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Entries of the Redis query log, oldest first"""
+    entries = await client.xrange(QUERY_LOG_KEY, count=count)
+    return [json.loads(fields["entry"]) for _, fields in entries]
+
+# Global instance
+query_log = QueryLog(
+    mode=settings.QUERY_LOG_MODE,
+    sample_rate=settings.QUERY_LOG_SAMPLE_RATE,
+    path=settings.QUERY_LOG_PATH,
+    maxlen=settings.QUERY_LOG_MAXLEN
+)
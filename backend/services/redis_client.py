@@ -1,29 +1,73 @@
-import aioredis
+import asyncio
 import json
-from typing import List, Dict, Any, Optional
+import uuid
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError, WatchError
+from typing import List, Dict, Any, Optional, Tuple
 from loguru import logger
 from utils.config import settings
+from .metrics import track_dependency, record_cache_lookup, REDIS_POOL_CONNECTIONS
+from .conversation_codec import ConversationCodec
+from .local_cache import LocalCache
+from .usage_counters import usage_counters
 
 redis_client = None
+# Conversation history is stored as binary entries, so it uses a client that
+# returns raw bytes instead of decoded strings
+raw_redis_client = None
+
+def _connection_pool(decode_responses: bool) -> redis.BlockingConnectionPool:
+    """Bounded pool; callers wait for a free connection instead of opening more"""
+    return redis.BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD or None,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+        retry=Retry(
+            ExponentialBackoff(cap=settings.REDIS_RETRY_BACKOFF_CAP, base=0.05),
+            settings.REDIS_RETRY_ATTEMPTS
+        ),
+        retry_on_error=[RedisConnectionError, RedisTimeoutError],
+        decode_responses=decode_responses
+    )
+
+def _pool_usage(client, state: str) -> int:
+    pool = getattr(client, "connection_pool", None)
+    if pool is None:
+        return 0
+    if state == "in_use":
+        return len(getattr(pool, "_in_use_connections", ()))
+    return len(getattr(pool, "_available_connections", ()))
 
 async def init_redis():
     """Initialize Redis connection"""
-    global redis_client
+    global redis_client, raw_redis_client
     try:
-        redis_url = f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
-        if settings.REDIS_PASSWORD:
-            redis_url = f"redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
-            
-        redis_client = aioredis.from_url(
-            redis_url,
-            decode_responses=True
-        )
+        redis_client = redis.Redis(connection_pool=_connection_pool(decode_responses=True))
+        raw_redis_client = redis.Redis(connection_pool=_connection_pool(decode_responses=False))
         await redis_client.ping()
         logger.info("Redis connection established")
     except Exception as e:
         logger.error(f"Redis connection failed: {e}")
         raise
 
+async def close_redis():
+    """Close both connection pools"""
+    global redis_client, raw_redis_client
+    for client in (redis_client, raw_redis_client):
+        if client is not None:
+            await client.connection_pool.disconnect()
+    redis_client = None
+    raw_redis_client = None
+
 async def get_redis_client():
     """Get Redis client instance"""
     global redis_client
@@ -31,47 +75,188 @@ async def get_redis_client():
         await init_redis()
     return redis_client
 
+async def get_raw_redis_client():
+    """Get Redis client instance that returns undecoded bytes"""
+    global raw_redis_client
+    if raw_redis_client is None:
+        await init_redis()
+    return raw_redis_client
+
+def get_redis_pool_stats() -> Dict[str, Any]:
+    """Get connection usage of both Redis pools"""
+    return {
+        name: {
+            "in_use": _pool_usage(client, "in_use"),
+            "idle": _pool_usage(client, "idle"),
+            "max_connections": settings.REDIS_MAX_CONNECTIONS
+        }
+        for name, client in (("default", redis_client), ("raw", raw_redis_client))
+    }
+
+def _track_pool(name: str, get_client):
+    for state in ("in_use", "idle"):
+        REDIS_POOL_CONNECTIONS.labels(pool=name, state=state).set_function(
+            lambda state=state: _pool_usage(get_client(), state)
+        )
+
+_track_pool("default", lambda: redis_client)
+_track_pool("raw", lambda: raw_redis_client)
+
+def _folded_tail_length(tail: List[bytes], folded: List[bytes]) -> int:
+    """How many of the folded turns (newest first) are still the last entries of the list"""
+    # Appends trim the oldest folded turns first, so what is left of them
+    # is always the newest `count` and sits at the very end of the list
+    for count in range(min(len(tail), len(folded)), 0, -1):
+        if tail[-count:] == folded[:count]:
+            return count
+    return 0
+
 class ConversationManager:
     """Manage user conversations in Redis"""
     
     def __init__(self):
         self.ttl = 3600 * 24  # 24 hours
+        self.codec = ConversationCodec(
+            encoding=settings.CONVERSATION_ENCODING,
+            compress_threshold=settings.CONVERSATION_COMPRESS_THRESHOLD
+        )
+        if settings.CONVERSATION_MEMORY_MODE == "summary":
+            # Room for turns waiting to be folded into the summary
+            self.max_length = settings.CONVERSATION_RECENT_TURNS + 2 * settings.CONVERSATION_SUMMARY_BATCH
+        else:
+            self.max_length = settings.MAX_CONVERSATION_HISTORY
+    
+    def _key(self, user_id: str) -> str:
+        return f"conversation:{user_id}"
+    
+    def _summary_key(self, user_id: str) -> str:
+        return f"conversation_summary:{user_id}"
     
-    async def get_conversation_history(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get recent conversation history for a user"""
+    def _queue_append(self, pipe, user_id: str, message: Dict[str, Any]):
+        """Queue push, trim, TTL refresh and usage counting for one message on a pipeline"""
+        key = self._key(user_id)
+        # Newest message first, keep only the latest messages
+        pipe.lpush(key, self.codec.encode(message))
+        pipe.ltrim(key, 0, self.max_length - 1)
+        pipe.expire(key, self.ttl)
+        pipe.expire(self._summary_key(user_id), self.ttl)
+        # Dashboard counters ride along in the same round trip
+        usage_counters.queue_message(pipe, user_id, message.get("role", "user"), message.get("timestamp"))
+    
+    def _queue_read(self, pipe, user_id: str):
+        """Queue reads of the recent turns and the rolling summary on a pipeline"""
+        pipe.lrange(self._key(user_id), 0, self.max_length - 1)
+        pipe.get(self._summary_key(user_id))
+    
+    def _decode_memory(self, history: List[bytes], summary: Optional[bytes]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return [self.codec.decode(msg) for msg in history], summary.decode("utf-8") if summary else None
+    
+    @track_dependency("redis", "get_summary_input")
+    async def get_summary_input(self, user_id: str, keep: int) -> Tuple[List[bytes], List[Dict[str, Any]], Optional[str]]:
+        """Turns older than the `keep` newest (newest first, as stored and decoded) and the current summary"""
+        client = await get_raw_redis_client()
+        pipe = client.pipeline(transaction=True)
+        self._queue_read(pipe, user_id)
+        history, summary = await pipe.execute()
+        older, summary = self._decode_memory(history[keep:], summary)
+        return history[keep:], older, summary
+    
+    @track_dependency("redis", "get_memory_and_append")
+    async def get_memory_and_append(self, user_id: str, message: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Read recent turns and summary as they were, then append a message, in one round trip"""
         try:
-            client = await get_redis_client()
-            key = f"conversation:{user_id}"
-            history = await client.lrange(key, 0, settings.MAX_CONVERSATION_HISTORY - 1)
-            return [json.loads(msg) for msg in history]
+            client = await get_raw_redis_client()
+            pipe = client.pipeline(transaction=True)
+            self._queue_read(pipe, user_id)
+            self._queue_append(pipe, user_id, message)
+            history, summary = (await pipe.execute())[:2]
+            return self._decode_memory(history, summary)
         except Exception as e:
-            logger.error(f"Error getting conversation history: {e}")
-            return []
+            logger.error(f"Error reading and appending conversation memory: {e}")
+            return [], None
     
+    @track_dependency("redis", "replace_summary")
+    async def replace_summary(self, user_id: str, summary: str, folded: List[bytes], attempts: int = 5) -> int:
+        """Store a new summary and drop the folded turns (newest first, as stored) still in the list"""
+        # The summary is written long after the turns were read. Appends in the
+        # meantime may already have trimmed some folded turns off the tail, so
+        # only the ones that are still there are removed, and nothing is trimmed
+        # if the list changes between the check and the write.
+        client = await get_raw_redis_client()
+        key = self._key(user_id)
+        async with client.pipeline(transaction=True) as pipe:
+            for _ in range(attempts):
+                try:
+                    await pipe.watch(key)
+                    tail = await pipe.lrange(key, -len(folded), -1) if folded else []
+                    remaining = _folded_tail_length(tail, folded)
+                    pipe.multi()
+                    pipe.set(self._summary_key(user_id), summary.encode("utf-8"), ex=self.ttl)
+                    if remaining:
+                        pipe.ltrim(key, 0, -(remaining + 1))
+                    await pipe.execute()
+                    return remaining
+                except WatchError:
+                    continue
+        raise WatchError(f"conversation {user_id} kept changing while storing its summary")
+    
+    async def acquire_summary_lock(self, user_id: str, ttl: int) -> Optional[bytes]:
+        """Claim the summary update for a user across workers, returning the owner token"""
+        client = await get_raw_redis_client()
+        token = uuid.uuid4().hex.encode()
+        if await client.set(f"conversation_summary_lock:{user_id}", token, nx=True, ex=ttl):
+            return token
+        return None
+    
+    async def release_summary_lock(self, user_id: str, token: bytes) -> bool:
+        """Release the lock only if it is still held with this token"""
+        # If the lock expired and another worker took it, deleting it blindly
+        # would let a third worker in alongside that one
+        client = await get_raw_redis_client()
+        key = f"conversation_summary_lock:{user_id}"
+        async with client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                if await pipe.get(key) != token:
+                    return False
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+                return True
+            except WatchError:
+                # Changed under us, so it is no longer ours
+                return False
+    
+    @track_dependency("redis", "add_message")
     async def add_message(self, user_id: str, message: Dict[str, Any]):
-        """Add a message to user's conversation history"""
+        """Add a message to user's conversation history in one round trip"""
         try:
-            client = await get_redis_client()
-            key = f"conversation:{user_id}"
-            
-            # Add message to the beginning of the list
-            await client.lpush(key, json.dumps(message))
-            
-            # Keep only the latest messages
-            await client.ltrim(key, 0, settings.MAX_CONVERSATION_HISTORY - 1)
-            
-            # Set expiration
-            await client.expire(key, self.ttl)
-            
+            client = await get_raw_redis_client()
+            pipe = client.pipeline(transaction=True)
+            self._queue_append(pipe, user_id, message)
+            await pipe.execute()
         except Exception as e:
             logger.error(f"Error adding message to conversation: {e}")
     
+    @track_dependency("redis", "add_messages_batch")
+    async def add_messages_batch(self, messages: List[Tuple[str, Dict[str, Any]]]):
+        """Append many (user_id, message) pairs, in order, with one round trip"""
+        if not messages:
+            return
+        try:
+            client = await get_raw_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for user_id, message in messages:
+                self._queue_append(pipe, user_id, message)
+            await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error adding conversation messages in batch: {e}")
+    
     async def clear_conversation(self, user_id: str):
         """Clear conversation history for a user"""
         try:
-            client = await get_redis_client()
-            key = f"conversation:{user_id}"
-            await client.delete(key)
+            client = await get_raw_redis_client()
+            await client.delete(self._key(user_id), self._summary_key(user_id))
         except Exception as e:
             logger.error(f"Error clearing conversation: {e}")
     
@@ -82,30 +267,157 @@ class ConversationManager:
 class CacheManager:
     """General purpose cache manager"""
     
+    # Values live in Redis; hot keys are also kept in a small per-process LRU.
+    # Writers publish the keys they change so other workers drop their copies,
+    # and the local TTL bounds staleness if an invalidation is missed.
+    
+    def __init__(self):
+        self.local = LocalCache(
+            max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+            ttl=settings.CACHE_LOCAL_TTL
+        ) if settings.CACHE_LOCAL_ENABLED else None
+        self.channel = settings.CACHE_INVALIDATION_CHANNEL
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+    
+    @track_dependency("redis", "cache_get")
     async def get(self, key: str) -> Optional[str]:
         """Get value from cache"""
+        if self.local is not None:
+            value = self.local.get(key)
+            record_cache_lookup("local_cache", value is not None)
+            if value is not None:
+                return value
         try:
             client = await get_redis_client()
-            return await client.get(key)
+            value = await client.get(key)
+            record_cache_lookup("redis_cache", value is not None)
+            if value is not None and self.local is not None:
+                self.local.set(key, value)
+            return value
         except Exception as e:
             logger.error(f"Error getting cache value: {e}")
             return None
     
+    @track_dependency("redis", "cache_get_many")
+    async def get_many(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        """Get several values, fetching local misses from Redis in one round trip"""
+        values: Dict[str, Optional[str]] = {}
+        missing = []
+        for key in keys:
+            value = self.local.get(key) if self.local is not None else None
+            if self.local is not None:
+                record_cache_lookup("local_cache", value is not None)
+            if value is None:
+                missing.append(key)
+            values[key] = value
+        
+        if missing:
+            try:
+                client = await get_redis_client()
+                for key, value in zip(missing, await client.mget(missing)):
+                    record_cache_lookup("redis_cache", value is not None)
+                    values[key] = value
+                    if value is not None and self.local is not None:
+                        self.local.set(key, value)
+            except Exception as e:
+                logger.error(f"Error getting cache values: {e}")
+        return values
+    
+    @track_dependency("redis", "cache_set")
     async def set(self, key: str, value: str, ttl: int = 3600):
         """Set value in cache with TTL"""
+        await self._set_many({key: value}, ttl)
+    
+    @track_dependency("redis", "cache_set_many")
+    async def set_many(self, items: Dict[str, str], ttl: int = 3600):
+        """Set several values with one pipelined round trip"""
+        await self._set_many(items, ttl)
+    
+    async def _set_many(self, items: Dict[str, str], ttl: int):
+        if not items:
+            return
         try:
             client = await get_redis_client()
-            await client.setex(key, ttl, value)
+            pipe = client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            self._queue_invalidation(pipe, list(items))
+            await pipe.execute()
+            if self.local is not None:
+                for key, value in items.items():
+                    self.local.set(key, value, ttl)
         except Exception as e:
             logger.error(f"Error setting cache value: {e}")
     
     async def delete(self, key: str):
         """Delete key from cache"""
+        if self.local is not None:
+            self.local.invalidate([key])
         try:
             client = await get_redis_client()
-            await client.delete(key)
+            pipe = client.pipeline(transaction=False)
+            pipe.delete(key)
+            self._queue_invalidation(pipe, [key])
+            await pipe.execute()
         except Exception as e:
             logger.error(f"Error deleting cache key: {e}")
+    
+    def _queue_invalidation(self, pipe, keys: List[str]):
+        """Tell the other workers to drop their local copies of these keys"""
+        if self.local is not None:
+            pipe.publish(self.channel, json.dumps({"origin": self.instance_id, "keys": keys}))
+    
+    def start(self):
+        """Start listening for invalidations from other workers"""
+        if self.local is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+    
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+    
+    async def _listen(self):
+        """Apply invalidation messages, resubscribing after connection errors"""
+        backoff = 1.0
+        while True:
+            pubsub = None
+            try:
+                client = await get_redis_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(self.channel)
+                # Anything written while we were not subscribed may be stale
+                self.local.clear()
+                backoff = 1.0
+                while True:
+                    # Poll with a timeout; a bare listen() would trip the socket timeout
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is None or message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    if payload.get("origin") != self.instance_id:
+                        self.local.invalidate(payload.get("keys", []))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error, retrying in {backoff:.0f}s: {e}")
+                self.local.clear()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.close()
+                    except Exception:
+                        pass
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get local tier statistics"""
+        if self.local is None:
+            return {"local_enabled": False}
+        return {"local_enabled": True, "listening": self._listener is not None, **self.local.get_stats()}
 
 # Global instances
 conversation_manager = ConversationManager()
@@ -0,0 +1,82 @@
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from loguru import logger
+from .metrics import record_cache_lookup
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = " ?!.,;:"
+
+def normalize_query(text: str) -> str:
+    """Normalize a user query so trivially different spellings share a key"""
+    normalized = _WHITESPACE_RE.sub(" ", text.strip().lower())
+    return normalized.rstrip(_TRAILING_PUNCTUATION)
+
+class _LeaderCancelled(Exception):
+    """Set on a shared future when its leader was cancelled rather than failed"""
+
+class RequestCoalescer:
+    """Share one in-flight computation between concurrent identical requests"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.total_requests = 0
+        self.coalesced_requests = 0
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() for key, or wait on the identical computation already running"""
+        self.total_requests += 1
+
+        future = self._in_flight.get(key)
+        record_cache_lookup(self.name, future is not None)
+        if future is not None:
+            self.coalesced_requests += 1
+            logger.debug(f"Coalesced request onto in-flight computation {key!r}")
+        while future is not None:
+            try:
+                # Shield so a cancelled follower does not cancel the leader's work
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                # Followers belong to other requests and must not inherit the
+                # leader's cancellation; one of them takes over the computation
+                future = self._in_flight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    @property
+    def coalescing_ratio(self) -> float:
+        """Fraction of requests that were served by another request's computation"""
+        if self.total_requests == 0:
+            return 0.0
+        return self.coalesced_requests / self.total_requests
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "total_requests": self.total_requests,
+            "coalesced_requests": self.coalesced_requests,
+            "coalescing_ratio": round(self.coalescing_ratio, 4),
+            "in_flight": len(self._in_flight)
+        }
+
+# Global instances
+retrieval_coalescer = RequestCoalescer("retrieval_coalescer")
+answer_coalescer = RequestCoalescer("answer_coalescer")
@@ -1,7 +1,11 @@
 import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from loguru import logger
 from utils.config import settings
+from .http_client import http_clients
+from .resilience import Deadline, reranker_breaker, stage_timeout, cut_short_by_deadline
+
+RERANK_TIMEOUT = 10.0
 
 class RerankerService:
     """Service for reranking retrieved documents"""
@@ -9,19 +13,32 @@ class RerankerService:
     def __init__(self):
         self.api_url = settings.RERANKER_API_URL
         self.api_key = settings.RERANKER_API_KEY
-        self.client = httpx.AsyncClient(timeout=10.0)
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client for the reranker endpoint"""
+        return http_clients.get("reranker")
     
     async def rerank_documents(
         self,
         query: str,
         documents: List[Dict[str, Any]],
-        top_k: int = 3
+        top_k: int = 3,
+        deadline: Optional[Deadline] = None
     ) -> List[Dict[str, Any]]:
         """Rerank documents based on relevance to query"""
+        if not documents:
+            return []
+        
+        # Degrade to vector-search order when the reranker is failing or out of time
+        if deadline is not None and deadline.exhausted:
+            logger.warning("Skipping rerank, message deadline exceeded")
+            return documents[:top_k]
+        if not reranker_breaker.allow_request():
+            logger.warning("Reranker circuit open, skipping rerank")
+            return documents[:top_k]
+        
         try:
-            if not documents:
-                return []
-            
             # Prepare documents for reranking
             doc_texts = [doc.get("text", "") for doc in documents]
             
@@ -41,7 +58,8 @@ class RerankerService:
             response = await self.client.post(
                 self.api_url,
                 json=payload,
-                headers=headers
+                headers=headers,
+                timeout=stage_timeout(deadline, RERANK_TIMEOUT)
             )
             response.raise_for_status()
             
@@ -56,9 +74,14 @@ class RerankerService:
                     doc["rerank_score"] = item.get("relevance_score", 0.0)
                     reranked_docs.append(doc)
             
+            reranker_breaker.record_success()
             return reranked_docs
             
         except Exception as e:
+            if cut_short_by_deadline(e, deadline):
+                logger.warning("Rerank cut short, message deadline exceeded")
+                return documents[:top_k]
+            reranker_breaker.record_failure()
             logger.error(f"Error reranking documents: {e}")
             # Return original documents if reranking fails
             return documents[:top_k]
@@ -0,0 +1,138 @@
+import asyncio
+import time
+import httpx
+from typing import Dict, Any, List, Optional
+from loguru import logger
+from utils.config import settings
+
+# A stage with less budget than this left is skipped rather than started
+MIN_STAGE_SECONDS = 0.05
+
+class Deadline:
+    """Time budget for one message, shared by every pipeline stage"""
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        """Seconds left in the budget, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        """Too little budget left to be worth starting another dependency call"""
+        return self.remaining() < MIN_STAGE_SECONDS
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """Remaining budget, optionally capped by a stage's own timeout"""
+        remaining = self.remaining()
+        if cap is not None:
+            return min(cap, remaining)
+        return remaining
+
+def stage_timeout(deadline: Optional[Deadline], cap: float) -> float:
+    """Timeout for a stage: its own cap, shortened to what is left of the deadline"""
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap)
+
+def cut_short_by_deadline(error: Exception, deadline: Optional[Deadline]) -> bool:
+    """Whether a call timed out because the message ran out of time, not because its dependency is slow"""
+    # Such timeouts come from earlier stages using up the budget and must
+    # not count against the dependency's circuit breaker
+    return (
+        deadline is not None
+        and deadline.expired
+        and isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException))
+    )
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a single half-open probe"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_started = 0.0
+        self.rejected_calls = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through; open circuits fail fast"""
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected_calls += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_started = 0.0
+            logger.info(f"Circuit breaker '{self.name}' half-open, probing dependency")
+
+        # Half-open: let one probe through, or another if the last one never reported back
+        now = time.monotonic()
+        if self._probe_started and now - self._probe_started < self.reset_timeout:
+            self.rejected_calls += 1
+            return False
+        self._probe_started = now
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit breaker '{self.name}' closed")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_started = 0.0
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit breaker '{self.name}' opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_started = 0.0
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get breaker state for the dashboard"""
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.times_opened,
+            "rejected_calls": self.rejected_calls,
+            "retry_in_seconds": round(retry_in, 1)
+        }
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+    )
+
+# Global instances
+milvus_breaker = _breaker("milvus")
+reranker_breaker = _breaker("reranker")
+llm_breaker = _breaker("llm")
+
+def get_circuit_breaker_states() -> List[Dict[str, Any]]:
+    """Get the state of every circuit breaker"""
+    return [breaker.get_state() for breaker in (milvus_breaker, reranker_breaker, llm_breaker)]
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+from loguru import logger
+from utils.config import settings
+from .metrics import record_cache_lookup
+from .request_coalescer import RequestCoalescer
+
+class _Entry:
+    __slots__ = ("value", "computed_at", "refresh_attempted_at")
+
+    def __init__(self, value: Any, computed_at: float):
+        self.value = value
+        self.computed_at = computed_at
+        self.refresh_attempted_at = computed_at
+
+class StaleWhileRevalidateCache:
+    """Serve the last computed result at once and refresh it in the background"""
+
+    # A result older than refresh_interval triggers at most one background
+    # refresh per key; callers keep getting the previous result until it lands.
+    # A failed refresh is not retried until another interval has passed.
+    # Only a result older than max_stale (or none at all) makes callers wait,
+    # and then they all share a single computation.
+
+    def __init__(self, name: str, refresh_interval: float, max_stale: float, max_entries: int = 256):
+        self.name = name
+        self.refresh_interval = refresh_interval
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: Dict[Hashable, asyncio.Task] = {}
+        self._coalescer = RequestCoalescer(f"{name}_refresh")
+        self.refresh_failures = 0
+
+    async def get(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        """Return (value, age in seconds) for key"""
+        entry = self._entries.get(key)
+        age = time.time() - entry.computed_at if entry is not None else None
+        record_cache_lookup(self.name, entry is not None and age <= self.max_stale)
+
+        if entry is None or age > self.max_stale:
+            entry = await self._coalescer.run(key, lambda: self._compute(key, compute))
+            return entry.value, time.time() - entry.computed_at
+
+        self._entries.move_to_end(key)
+        now = time.time()
+        if now - entry.refresh_attempted_at > self.refresh_interval and key not in self._refreshing:
+            entry.refresh_attempted_at = now
+            task = asyncio.create_task(self._refresh(key, compute))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return entry.value, age
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> _Entry:
+        value = await compute()
+        entry = _Entry(value, time.time())
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    async def _refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        """Background refresh; on failure the previous result stays in place"""
+        try:
+            await self._coalescer.run(key, lambda: self._compute(key, compute))
+        except Exception as e:
+            self.refresh_failures += 1
+            logger.warning(f"Background refresh of {self.name} {key!r} failed: {e}")
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache contents and refresh statistics"""
+        now = time.time()
+        return {
+            "max_entries": self.max_entries,
+            "entries": {
+                str(key): round(now - entry.computed_at, 1) for key, entry in self._entries.items()
+            },
+            "refreshing": len(self._refreshing),
+            "refresh_failures": self.refresh_failures,
+            **self._coalescer.get_stats()
+        }
+
+def with_data_age(value: Any, age: float) -> Any:
+    """Copy of a dict payload, or of each dict in a list payload, with its data age"""
+    age = round(age, 1)
+    if isinstance(value, dict):
+        return {**value, "data_age_seconds": age}
+    if isinstance(value, list):
+        return [{**item, "data_age_seconds": age} if isinstance(item, dict) else item for item in value]
+    return value
+
+# Global instance
+dashboard_cache = StaleWhileRevalidateCache(
+    name="dashboard_cache",
+    refresh_interval=settings.DASHBOARD_CACHE_REFRESH_SECONDS,
+    max_stale=settings.DASHBOARD_CACHE_MAX_STALE_SECONDS,
+    max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES
+)
@@ -5,18 +5,20 @@ from urllib.parse import urljoin, urlparse
 from typing import List, Dict, Any, Set
 from loguru import logger
 from utils.config import settings
+from .http_client import http_clients
 import time
 
 class WebScrapingService:
     """Service for web scraping and content extraction"""
     
     def __init__(self):
-        self.client = httpx.AsyncClient(
-            timeout=30.0,
-            headers={"User-Agent": settings.USER_AGENT}
-        )
         self.visited_urls: Set[str] = set()
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared pooled client for scraping requests"""
+        return http_clients.get("scraping")
+    
     async def scrape_website(
         self,
         base_url: str,
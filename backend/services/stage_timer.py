@@ -0,0 +1,74 @@
+import time
+from collections import deque
+from typing import Any, Awaitable, Dict, TypeVar
+from .metrics import PIPELINE_STAGE_LATENCY
+
+T = TypeVar("T")
+
+class StageTimings:
+    """Wall-clock durations of the pipeline stages for one message"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages: Dict[str, float] = {}
+
+    async def measure(self, stage: str, awaitable: Awaitable[T]) -> T:
+        """Await a stage and record how long it took"""
+        started = time.monotonic()
+        try:
+            return await awaitable
+        finally:
+            duration = time.monotonic() - started
+            self.stages[stage] = duration
+            PIPELINE_STAGE_LATENCY.labels(stage=stage).observe(duration)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> Dict[str, Any]:
+        """Stage durations plus the latency saved by running stages concurrently"""
+        elapsed = self.elapsed
+        serial = sum(self.stages.values())
+        return {
+            "stages_ms": {stage: round(d * 1000, 2) for stage, d in self.stages.items()},
+            "total_ms": round(elapsed * 1000, 2),
+            "serial_ms": round(serial * 1000, 2),
+            "saved_ms": round(max(0.0, serial - elapsed) * 1000, 2)
+        }
+
+class PipelineTimingStats:
+    """Rolling averages of per-message stage timings"""
+
+    def __init__(self, window: int = 1000):
+        self._recent = deque(maxlen=window)
+
+    def record(self, timings: StageTimings):
+        self._recent.append((dict(timings.stages), timings.elapsed))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Average duration per stage, end to end, and saved by overlap"""
+        if not self._recent:
+            return {"samples": 0, "stages_ms": {}, "avg_total_ms": 0.0, "avg_saved_ms": 0.0}
+
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        elapsed_sum = 0.0
+        saved_sum = 0.0
+        for stages, elapsed in self._recent:
+            for stage, duration in stages.items():
+                totals[stage] = totals.get(stage, 0.0) + duration
+                counts[stage] = counts.get(stage, 0) + 1
+            elapsed_sum += elapsed
+            saved_sum += max(0.0, sum(stages.values()) - elapsed)
+
+        samples = len(self._recent)
+        return {
+            "samples": samples,
+            "stages_ms": {stage: round(totals[stage] / counts[stage] * 1000, 2) for stage in totals},
+            "avg_total_ms": round(elapsed_sum / samples * 1000, 2),
+            "avg_saved_ms": round(saved_sum / samples * 1000, 2)
+        }
+
+# Global instance
+pipeline_timing_stats = PipelineTimingStats()
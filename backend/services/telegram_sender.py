@@ -0,0 +1,369 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
+from loguru import logger
+from utils.config import settings
+from .http_client import http_clients
+from .metrics import QUEUE_DEPTH, PIPELINE_STAGE_LATENCY
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+# 429s for this many different chats within a second mean the bot as a whole
+# is over Telegram's limit, not just one chat
+GLOBAL_RATE_LIMIT_CHATS = 3
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds`, e.g. after a 429 with retry_after"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def try_acquire(self) -> float:
+        """Take a token, or return how many seconds to wait before one is available"""
+        pause = self.paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity and self.paused_until <= time.monotonic()
+
+def split_message(text: str, limit: int = TELEGRAM_MAX_MESSAGE_LENGTH) -> List[str]:
+    """Split text into Telegram-sized chunks, preferring paragraph, line and word breaks"""
+    chunks = []
+    while len(text) > limit:
+        window = text[:limit]
+        # Take the strongest break in the second half of the window
+        cut = limit
+        for separator in ("\n\n", "\n", " "):
+            position = window.rfind(separator)
+            if position > limit // 2:
+                cut = position
+                break
+        chunks.append(text[:cut].rstrip())
+        text = text[cut:].lstrip()
+    if text:
+        chunks.append(text)
+    return chunks
+
+def retry_after_seconds(response) -> float:
+    """Delay requested by a 429, from the Bot API body, else the Retry-After header, else 1s"""
+    try:
+        retry_after = response.json().get("parameters", {}).get("retry_after")
+        if retry_after is not None:
+            return float(retry_after)
+    except Exception:
+        # Not a Bot API body, e.g. an error page from a proxy
+        pass
+    try:
+        return float(response.headers.get("Retry-After", 1))
+    except ValueError:
+        return 1.0
+
+class _Outgoing:
+    """One queued reply and the delivery progress of its chunks"""
+
+    __slots__ = ("chunks", "enqueued_at", "index", "attempts", "markdown")
+
+    def __init__(self, chunks: List[str], enqueued_at: float):
+        self.chunks = chunks
+        self.enqueued_at = enqueued_at
+        self.index = 0
+        self.attempts = 0
+        self.markdown = True
+
+    @property
+    def done(self) -> bool:
+        return self.index >= len(self.chunks)
+
+    def next_chunk(self):
+        self.index += 1
+        self.attempts = 0
+        self.markdown = True
+
+class _Shard:
+    """Pending replies of the chats owned by one worker, each chat in its own FIFO"""
+
+    def __init__(self, capacity: int):
+        self.slots = asyncio.Semaphore(capacity)
+        self.chats: Dict[int, Deque[_Outgoing]] = {}
+        # (ready at, sequence, chat id) for every chat with pending replies
+        self.ready: List[Tuple[float, int, int]] = []
+        self.wakeup = asyncio.Event()
+        self.pending = 0
+        self._sequence = itertools.count()
+
+    def add(self, chat_id: int, message: _Outgoing):
+        queue = self.chats.get(chat_id)
+        if queue is None:
+            queue = self.chats[chat_id] = deque()
+            self.schedule(chat_id, 0.0)
+        queue.append(message)
+        self.pending += 1
+
+    def schedule(self, chat_id: int, delay: float):
+        heapq.heappush(self.ready, (time.monotonic() + delay, next(self._sequence), chat_id))
+        self.wakeup.set()
+
+    def finish(self, chat_id: int):
+        """Drop a chat's delivered head message, rescheduling the chat if more are waiting"""
+        queue = self.chats[chat_id]
+        queue.popleft()
+        self.pending -= 1
+        self.slots.release()
+        if queue:
+            self.schedule(chat_id, 0.0)
+        else:
+            del self.chats[chat_id]
+
+class TelegramSender:
+    """Rate-limited outbound queue for Telegram sendMessage calls"""
+
+    # Each worker owns one shard of chats and each chat has its own FIFO, so
+    # the replies to a chat, and the chunks of each reply, go out in order.
+    # A chat that is out of tokens or paused by a 429 is rescheduled for when
+    # it may send again; the worker meanwhile serves the shard's other chats.
+
+    MAX_TRACKED_CHATS = 10000
+
+    def __init__(
+        self,
+        global_rate: float,
+        per_chat_rate: float,
+        per_chat_burst: int,
+        max_queue_size: int,
+        workers: int,
+        max_retries: int
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self.worker_count = workers
+        self.shard_capacity = max(1, max_queue_size // workers)
+        self._shards: List[_Shard] = [_Shard(self.shard_capacity) for _ in range(workers)]
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._recent_rate_limits: Deque[Tuple[float, int]] = deque()
+        self._workers: List[asyncio.Task] = []
+        self._send_latencies = deque(maxlen=1000)
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0
+
+    def start(self):
+        """Start the sender workers"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i, shard)) for i, shard in enumerate(self._shards)
+        ]
+        logger.info(f"Telegram sender started with {self.worker_count} workers")
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Drain pending messages, then stop the workers"""
+        if not self._workers:
+            return
+        deadline = time.monotonic() + drain_timeout
+        while self.queue_depth and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        if self.queue_depth:
+            logger.warning(f"Telegram sender stopped with {self.queue_depth} messages undelivered")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Telegram sender stopped")
+
+    async def send(self, chat_id: int, text: str, timeout: float = 0.0) -> bool:
+        """Queue a message for delivery, waiting up to `timeout` for room; False if it was dropped"""
+        self.start()
+        shard = self._shards[chat_id % self.worker_count]
+        try:
+            if shard.slots.locked() and timeout <= 0:
+                raise asyncio.TimeoutError
+            await asyncio.wait_for(shard.slots.acquire(), timeout if timeout > 0 else None)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            logger.error(f"Telegram send queue full, dropping reply to chat {chat_id}")
+            return False
+        shard.add(chat_id, _Outgoing(split_message(text), time.monotonic()))
+        return True
+
+    async def _worker(self, index: int, shard: _Shard):
+        while True:
+            if not shard.ready:
+                shard.wakeup.clear()
+                await shard.wakeup.wait()
+                continue
+
+            ready_at, _, chat_id = shard.ready[0]
+            delay = ready_at - time.monotonic()
+            if delay > 0:
+                # Idle until the earliest chat may send, or new work arrives
+                shard.wakeup.clear()
+                try:
+                    await asyncio.wait_for(shard.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(shard.ready)
+
+            wait = self._chat_bucket(chat_id).try_acquire()
+            if wait > 0:
+                shard.schedule(chat_id, wait)
+                continue
+
+            message = shard.chats[chat_id][0]
+            try:
+                await self._wait_for_global_token()
+                retry_in = await self._send_chunk(chat_id, message)
+            except Exception as e:
+                logger.error(f"Telegram sender worker {index} error: {e}")
+                self.failed += 1
+                retry_in = None
+                message.index = len(message.chunks)
+            if retry_in is not None:
+                shard.schedule(chat_id, retry_in)
+                continue
+
+            if not message.done:
+                shard.schedule(chat_id, 0.0)
+                continue
+            latency = time.monotonic() - message.enqueued_at
+            self._send_latencies.append(latency)
+            PIPELINE_STAGE_LATENCY.labels(stage="telegram_delivery").observe(latency)
+            shard.finish(chat_id)
+
+    async def _wait_for_global_token(self):
+        """The bot-wide limit holds back every chat alike, so it is waited out in place"""
+        while True:
+            wait = self.global_bucket.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    async def _send_chunk(self, chat_id: int, message: _Outgoing) -> Optional[float]:
+        """Try the message's next chunk once; returns seconds until a retry, or None once it is settled"""
+        bot_token = settings.TELEGRAM_BOT_TOKEN
+        if not bot_token:
+            logger.error("Telegram bot token not configured")
+            message.index = len(message.chunks)
+            return None
+
+        payload = {"chat_id": chat_id, "text": message.chunks[message.index]}
+        if message.markdown:
+            payload["parse_mode"] = "Markdown"
+
+        try:
+            client = http_clients.get("telegram")
+            response = await client.post(f"/bot{bot_token}/sendMessage", json=payload)
+        except Exception as e:
+            message.attempts += 1
+            logger.warning(f"Telegram send attempt {message.attempts} failed: {e}")
+            return self._retry_delay(chat_id, message, 2 ** (message.attempts - 1))
+
+        if response.status_code == 429:
+            self.rate_limited += 1
+            message.attempts += 1
+            retry_after = retry_after_seconds(response)
+            logger.warning(f"Telegram rate limited chat {chat_id}, retrying after {retry_after}s")
+            self._chat_bucket(chat_id).pause(retry_after)
+            self._record_rate_limit(chat_id, retry_after)
+            return self._retry_delay(chat_id, message, retry_after)
+
+        if response.status_code == 400 and message.markdown:
+            # LLM output is not always valid Markdown; resend as plain text
+            message.markdown = False
+            return 0.0
+
+        if response.is_success:
+            self.sent += 1
+            logger.info(f"Message sent to chat {chat_id}")
+        else:
+            self.failed += 1
+            logger.error(f"Error sending Telegram message: HTTP {response.status_code} {response.text}")
+        message.next_chunk()
+        return None
+
+    def _retry_delay(self, chat_id: int, message: _Outgoing, delay: float) -> Optional[float]:
+        """Delay before retrying the current chunk, or None after giving up on it"""
+        if message.attempts <= self.max_retries:
+            return delay
+        self.failed += 1
+        logger.error(f"Giving up sending message to chat {chat_id} after {self.max_retries} retries")
+        message.next_chunk()
+        return None
+
+    def _record_rate_limit(self, chat_id: int, retry_after: float):
+        """Pause all chats only when 429s show the bot-wide limit was hit"""
+        now = time.monotonic()
+        self._recent_rate_limits.append((now, chat_id))
+        while self._recent_rate_limits and now - self._recent_rate_limits[0][0] > 1.0:
+            self._recent_rate_limits.popleft()
+        if len({cid for _, cid in self._recent_rate_limits}) >= GLOBAL_RATE_LIMIT_CHATS:
+            logger.warning(f"Telegram rate limiting several chats, pausing all sends for {retry_after}s")
+            self.global_bucket.pause(retry_after)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_TRACKED_CHATS:
+                # Idle chats have full buckets, so forgetting them loses nothing
+                self._chat_buckets = {
+                    cid: b for cid, b in self._chat_buckets.items() if not b.is_full
+                }
+            bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(shard.pending for shard in self._shards)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth, throughput and send latency statistics"""
+        latencies = sorted(self._send_latencies)
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.shard_capacity * self.worker_count,
+            "workers": len(self._workers),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+            "avg_send_latency_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "p95_send_latency_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else 0.0
+        }
+
+# Global instance
+telegram_sender = TelegramSender(
+    global_rate=settings.TELEGRAM_GLOBAL_RATE_LIMIT,
+    per_chat_rate=settings.TELEGRAM_PER_CHAT_RATE_LIMIT,
+    per_chat_burst=settings.TELEGRAM_PER_CHAT_BURST,
+    max_queue_size=settings.TELEGRAM_SEND_QUEUE_SIZE,
+    workers=settings.TELEGRAM_SEND_WORKERS,
+    max_retries=settings.TELEGRAM_SEND_MAX_RETRIES
+)
+QUEUE_DEPTH.labels(queue="telegram_send").set_function(lambda: telegram_sender.queue_depth)
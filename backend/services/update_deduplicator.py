@@ -0,0 +1,70 @@
+from typing import Dict, Any, List
+from loguru import logger
+from utils.config import settings
+from .redis_client import get_redis_client
+
+class UpdateDeduplicator:
+    """Drop Telegram updates that were already accepted, e.g. webhook retries"""
+
+    # Bitmap mode: one bit per update_id, 2^20 ids (128 KB) per Redis key
+    BITMAP_WINDOW = 1 << 20
+
+    def __init__(self, mode: str = "key", ttl: int = 3600):
+        self.mode = mode
+        self.ttl = ttl
+        self.checked = 0
+        self.duplicates = 0
+
+    async def is_duplicate(self, update_id: int) -> bool:
+        """Atomically mark update_id as seen; True if it had been seen before"""
+        return (await self.check_many([update_id]))[0]
+
+    async def check_many(self, update_ids: List[int]) -> List[bool]:
+        """Mark a batch of update_ids as seen in one round trip; True for each one seen before"""
+        if not update_ids:
+            return []
+        self.checked += len(update_ids)
+        try:
+            client = await get_redis_client()
+            pipe = client.pipeline(transaction=False)
+            for update_id in update_ids:
+                self._queue_check(pipe, update_id)
+            results = await pipe.execute()
+        except Exception as e:
+            # Fail open: processing a retry twice beats dropping a new message
+            logger.error(f"Error checking updates {update_ids} for duplicates: {e}")
+            return [False] * len(update_ids)
+
+        if self.mode == "bitmap":
+            # SETBIT returns the previous bit; every EXPIRE reply is skipped
+            seen = [bool(previous) for previous in results[0::2]]
+        else:
+            seen = [not created for created in results]
+        for update_id, duplicate in zip(update_ids, seen):
+            if duplicate:
+                self.duplicates += 1
+                logger.info(f"Ignoring duplicate Telegram update {update_id}")
+        return seen
+
+    def _queue_check(self, pipe, update_id: int):
+        if self.mode == "bitmap":
+            window, offset = divmod(update_id, self.BITMAP_WINDOW)
+            key = f"telegram:updates:{window}"
+            pipe.setbit(key, offset, 1)
+            pipe.expire(key, self.ttl)
+        else:
+            pipe.set(f"telegram:update:{update_id}", 1, nx=True, ex=self.ttl)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get duplicate detection statistics"""
+        return {
+            "mode": self.mode,
+            "checked": self.checked,
+            "duplicates": self.duplicates
+        }
+
+# Global instance
+update_deduplicator = UpdateDeduplicator(
+    mode=settings.TELEGRAM_DEDUP_MODE,
+    ttl=settings.TELEGRAM_DEDUP_TTL
+)
@@ -0,0 +1,70 @@
+import time
+from typing import Dict, List, Optional
+
+HOUR_SECONDS = 3600
+
+class UsageCounters:
+    """Hourly message counters and active-user HyperLogLogs kept up to date on write"""
+
+    # A day of active users is the PFCOUNT union of 24 hourly sketches, so any
+    # rolling 24h window is a constant number of O(1) reads however many users
+    # there are.
+
+    def __init__(self, prefix: str = "usage", retention_seconds: int = 8 * 24 * 3600):
+        self.prefix = prefix
+        self.retention_seconds = retention_seconds
+
+    def _hour(self, timestamp: float) -> int:
+        return int(timestamp) - int(timestamp) % HOUR_SECONDS
+
+    def _messages_key(self, hour: int) -> str:
+        return f"{self.prefix}:messages:{hour}"
+
+    def _users_key(self, hour: int) -> str:
+        return f"{self.prefix}:users:{hour}"
+
+    def queue_message(self, pipe, user_id: str, role: str, timestamp: Optional[float] = None):
+        """Queue the counter updates for one stored conversation turn on a pipeline"""
+        # Only user turns count, so "messages" is messages received, not replies
+        if role != "user":
+            return
+        hour = self._hour(time.time() if timestamp is None else timestamp)
+        messages_key = self._messages_key(hour)
+        pipe.incr(messages_key)
+        pipe.expire(messages_key, self.retention_seconds)
+        users_key = self._users_key(hour)
+        pipe.pfadd(users_key, user_id)
+        pipe.expire(users_key, self.retention_seconds)
+
+    def _hours(self, end: float, count: int) -> List[int]:
+        last = self._hour(end)
+        return [last - i * HOUR_SECONDS for i in range(count)]
+
+    async def get_daily_summary(self, client, now: Optional[float] = None) -> Dict[str, int]:
+        """Messages and unique users over the last 24h and the 24h before, in one round trip"""
+        now = time.time() if now is None else now
+        current = self._hours(now, 24)
+        previous = self._hours(now - 24 * HOUR_SECONDS, 24)
+
+        pipe = client.pipeline(transaction=False)
+        pipe.mget([self._messages_key(hour) for hour in current + previous])
+        pipe.pfcount(*[self._users_key(hour) for hour in current])
+        pipe.pfcount(*[self._users_key(hour) for hour in previous])
+        counts, users, previous_users = await pipe.execute()
+
+        counts = [int(count) if count else 0 for count in counts]
+        return {
+            "messages": sum(counts[:24]),
+            "previous_messages": sum(counts[24:]),
+            "active_users": users,
+            "previous_active_users": previous_users
+        }
+
+def percent_change(current: int, previous: int) -> str:
+    """Format a change as the dashboard shows it, e.g. '+12.5%'"""
+    if not previous:
+        return "0%"
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+# Global instance
+usage_counters = UsageCounters()
@@ -0,0 +1,148 @@
+import asyncio
+from typing import List, Dict, Any, Optional
+from loguru import logger
+from services.http_client import http_clients
+from services.redis_client import get_redis_client
+from routers.telegram import handle_updates
+from utils.config import settings
+
+OFFSET_KEY = "telegram:updates_offset"
+
+class TelegramPoller:
+    """Long-polling getUpdates ingestion as an alternative to the webhook"""
+
+    def __init__(self, batch_size: int = 100, poll_timeout: int = 50):
+        self.batch_size = batch_size
+        self.poll_timeout = poll_timeout
+        self.running = False
+        self._polling = False
+        self._task: Optional[asyncio.Task] = None
+        self.updates_received = 0
+        self.batches = 0
+
+    async def start(self):
+        """Start polling in the background"""
+        if self._task is not None:
+            return
+        if not settings.TELEGRAM_BOT_TOKEN:
+            logger.error("Telegram bot token not configured, polling not started")
+            return
+
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+        logger.info("Telegram long polling started")
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop polling; a batch being handled is finished and acknowledged, a waiting long poll is abandoned"""
+        self.running = False
+        if self._task is not None:
+            if not self._polling:
+                await asyncio.wait({self._task}, timeout=timeout)
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        logger.info("Telegram long polling stopped")
+
+    async def _run(self):
+        await self._delete_webhook()
+        offset = await self._load_offset()
+        backoff = 1
+        while self.running:
+            try:
+                self._polling = True
+                updates = await self._get_updates(offset)
+                backoff = 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error polling Telegram updates: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+                continue
+            finally:
+                self._polling = False
+
+            if not updates:
+                continue
+
+            self.batches += 1
+            self.updates_received += len(updates)
+            try:
+                await handle_updates([(update["update_id"], update.get("message")) for update in updates])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Acknowledge anyway; a batch that always fails would stall ingestion
+                logger.error(f"Error handling Telegram updates {updates[0]['update_id']}-{updates[-1]['update_id']}: {e}")
+
+            # Acknowledge the batch; Telegram drops updates below the new offset
+            offset = updates[-1]["update_id"] + 1
+            await self._save_offset(offset)
+
+    async def _delete_webhook(self):
+        """Remove any registered webhook, which makes getUpdates fail, retrying until it works"""
+        backoff = 1
+        while self.running:
+            try:
+                await self._call("deleteWebhook", {"drop_pending_updates": False})
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error deleting Telegram webhook, retrying in {backoff}s: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60)
+
+    async def _get_updates(self, offset: Optional[int]) -> List[Dict[str, Any]]:
+        """Fetch the next batch of updates, waiting up to poll_timeout for new ones"""
+        payload = {
+            "timeout": self.poll_timeout,
+            "limit": self.batch_size,
+            "allowed_updates": ["message"]
+        }
+        if offset is not None:
+            payload["offset"] = offset
+        result = await self._call("getUpdates", payload, timeout=self.poll_timeout + 10)
+        return result or []
+
+    async def _call(self, method: str, payload: Dict[str, Any], timeout: float = 30.0) -> Any:
+        """Call a Bot API method and return its result"""
+        client = http_clients.get("telegram")
+        response = await client.post(
+            f"/bot{settings.TELEGRAM_BOT_TOKEN}/{method}",
+            json=payload,
+            timeout=timeout
+        )
+        response.raise_for_status()
+        return response.json().get("result")
+
+    async def _load_offset(self) -> Optional[int]:
+        try:
+            client = await get_redis_client()
+            value = await client.get(OFFSET_KEY)
+            return int(value) if value is not None else None
+        except Exception as e:
+            logger.error(f"Error loading Telegram update offset: {e}")
+            return None
+
+    async def _save_offset(self, offset: int):
+        try:
+            client = await get_redis_client()
+            await client.set(OFFSET_KEY, offset)
+        except Exception as e:
+            logger.error(f"Error saving Telegram update offset: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get polling statistics"""
+        return {
+            "running": self.running,
+            "batches": self.batches,
+            "updates_received": self.updates_received,
+            "avg_batch_size": round(self.updates_received / self.batches, 2) if self.batches else 0.0
+        }
+
+# Global poller instance
+telegram_poller = TelegramPoller(
+    batch_size=settings.TELEGRAM_POLL_BATCH_SIZE,
+    poll_timeout=settings.TELEGRAM_POLL_TIMEOUT
+)
@@ -0,0 +1,22 @@
+import pytest
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Point the shared Redis clients at an in-memory server for the test"""
+    fakeredis = pytest.importorskip("fakeredis")
+    import services.redis_client as redis_client
+    import services.update_deduplicator as update_deduplicator
+
+    server = fakeredis.FakeServer()
+
+    # Clients are created per call, so each asyncio.run gets ones bound to its own loop
+    async def get_redis_client():
+        return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    async def get_raw_redis_client():
+        return fakeredis.FakeAsyncRedis(server=server)
+
+    monkeypatch.setattr(redis_client, "get_redis_client", get_redis_client)
+    monkeypatch.setattr(redis_client, "get_raw_redis_client", get_raw_redis_client)
+    monkeypatch.setattr(update_deduplicator, "get_redis_client", get_redis_client)
+    return get_raw_redis_client
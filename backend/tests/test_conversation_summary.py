@@ -0,0 +1,108 @@
+import asyncio
+from services.redis_client import ConversationManager, _folded_tail_length
+import services.conversation_memory as conversation_memory
+
+def turn(i):
+    return {"role": "user" if i % 2 else "assistant", "content": f"t{i}", "timestamp": 1700000000 + i}
+
+def make_manager(max_length=12):
+    manager = ConversationManager()
+    manager.max_length = max_length
+    return manager
+
+async def append_turns(manager, user_id, numbers):
+    for i in numbers:
+        await manager.add_message(user_id, turn(i))
+
+async def contents(raw_client, manager, user_id):
+    client = await raw_client()
+    return [manager.codec.decode(entry)["content"] for entry in await client.lrange(manager._key(user_id), 0, -1)]
+
+def test_folded_tail_length():
+    folded = [b"t6", b"t5", b"t4"]
+    assert _folded_tail_length([b"t6", b"t5", b"t4"], folded) == 3
+    # The oldest folded turns were trimmed by later appends
+    assert _folded_tail_length([b"t8", b"t7", b"t6"], folded) == 1
+    assert _folded_tail_length([b"t9", b"t8", b"t7"], folded) == 0
+    assert _folded_tail_length([], folded) == 0
+
+def test_replace_summary_drops_only_folded_turns(fake_redis):
+    async def scenario():
+        manager = make_manager()
+        await append_turns(manager, "u1", range(1, 11))
+        folded, older, summary = await manager.get_summary_input("u1", keep=4)
+        await manager.replace_summary("u1", "summary of t1-t6", folded)
+        _, stored_summary = await manager.get_memory_and_append("u1", turn(11))
+        return older, summary, stored_summary, await contents(fake_redis, manager, "u1")
+
+    older, previous, stored, remaining = asyncio.run(scenario())
+    assert [message["content"] for message in older] == ["t6", "t5", "t4", "t3", "t2", "t1"]
+    assert previous is None
+    assert stored == "summary of t1-t6"
+    assert remaining == ["t11", "t10", "t9", "t8", "t7"]
+
+def test_replace_summary_keeps_turns_appended_while_summarizing(fake_redis):
+    async def scenario():
+        manager = make_manager()
+        await append_turns(manager, "u1", range(1, 11))
+        folded, _, _ = await manager.get_summary_input("u1", keep=4)
+        # Three new turns push t1 out of the list before the summary lands
+        await append_turns(manager, "u1", range(11, 14))
+        removed = await manager.replace_summary("u1", "summary", folded)
+        return removed, await contents(fake_redis, manager, "u1")
+
+    removed, remaining = asyncio.run(scenario())
+    assert removed == 5
+    assert remaining == ["t13", "t12", "t11", "t10", "t9", "t8", "t7"]
+
+def test_summary_lock_is_released_only_by_its_owner(fake_redis):
+    async def scenario():
+        manager = make_manager()
+        token = await manager.acquire_summary_lock("u1", ttl=60)
+        second = await manager.acquire_summary_lock("u1", ttl=60)
+        # The lock expires and another worker takes it
+        client = await fake_redis()
+        await client.delete("conversation_summary_lock:u1")
+        other = await manager.acquire_summary_lock("u1", ttl=60)
+        stale_release = await manager.release_summary_lock("u1", token)
+        still_held = await client.get("conversation_summary_lock:u1")
+        owner_release = await manager.release_summary_lock("u1", other)
+        return token, second, other, stale_release, still_held, owner_release
+
+    token, second, other, stale_release, still_held, owner_release = asyncio.run(scenario())
+    assert token is not None and second is None
+    assert stale_release is False
+    assert still_held == other
+    assert owner_release is True
+
+def test_summarizer_folds_older_turns(fake_redis, monkeypatch):
+    manager = make_manager()
+    monkeypatch.setattr(conversation_memory, "conversation_manager", manager)
+    seen = []
+
+    async def summarize_conversation(previous_summary, turns):
+        seen.append([message["content"] for message in turns])
+        return "summary"
+
+    monkeypatch.setattr(conversation_memory.llm_service, "summarize_conversation", summarize_conversation)
+
+    async def scenario():
+        summarizer = conversation_memory.ConversationSummarizer(recent_turns=4, batch_size=6)
+        await append_turns(manager, "u1", range(1, 11))
+        await summarizer._update("u1")
+        client = await fake_redis()
+        return (
+            summarizer,
+            await contents(fake_redis, manager, "u1"),
+            await client.get("conversation_summary:u1"),
+            await client.exists("conversation_summary_lock:u1")
+        )
+
+    summarizer, remaining, summary, locked = asyncio.run(scenario())
+    # Oldest first for the summarizer
+    assert seen == [["t1", "t2", "t3", "t4", "t5", "t6"]]
+    assert remaining == ["t10", "t9", "t8", "t7"]
+    assert summary == b"summary"
+    assert not locked
+    assert summarizer.get_stats()["updates"] == 1
+    assert summarizer.get_stats()["turns_folded"] == 6
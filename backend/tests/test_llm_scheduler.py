@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from services.llm_scheduler import LLMScheduler, Priority, SchedulerRejected
+
+def test_freed_slot_goes_to_interactive_before_earlier_batch():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_size=10)
+        order = []
+        release = asyncio.Event()
+
+        async def request(name, priority):
+            async with scheduler.slot(priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        first = asyncio.create_task(request("first", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(request("batch", Priority.BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(request("interactive", Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(first, batch, interactive)
+        return order, scheduler
+
+    order, scheduler = asyncio.run(scenario())
+    assert order == ["first", "interactive", "batch"]
+    assert scheduler.get_stats()["active"] == 0
+    assert scheduler.queued == 0
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_size=1)
+        async with scheduler.slot():
+            waiter = asyncio.create_task(scheduler._acquire(Priority.BATCH, None))
+            await asyncio.sleep(0)
+            with pytest.raises(SchedulerRejected) as rejected:
+                await scheduler._acquire(Priority.INTERACTIVE, None)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+        return rejected.value.reason, scheduler
+
+    reason, scheduler = asyncio.run(scenario())
+    assert reason == "queue_full"
+    assert scheduler.rejected_queue_full == 1
+    assert scheduler.get_stats()["active"] == 0
+    assert scheduler.queued == 0
+
+def test_queue_timeout_rejects_and_frees_the_queue_place():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=1, max_queue_size=1)
+        async with scheduler.slot():
+            with pytest.raises(SchedulerRejected) as rejected:
+                async with scheduler.slot(timeout=0.01):
+                    pass
+        return rejected.value.reason, scheduler
+
+    reason, scheduler = asyncio.run(scenario())
+    assert reason == "queue_timeout"
+    assert scheduler.rejected_timeout == 1
+    assert scheduler.queued == 0
+    assert scheduler.get_stats()["active"] == 0
+
+def test_try_acquire_only_takes_a_free_slot():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=2, max_queue_size=5)
+        assert scheduler.try_acquire()
+        assert scheduler.try_acquire()
+        # At capacity, and later with someone waiting, optional work is skipped
+        assert not scheduler.try_acquire()
+        waiter = asyncio.create_task(scheduler._acquire(Priority.BATCH, None))
+        await asyncio.sleep(0)
+        scheduler.release()
+        assert not scheduler.try_acquire()
+        await waiter
+        scheduler.release()
+        scheduler.release()
+        return scheduler
+
+    scheduler = asyncio.run(scenario())
+    assert scheduler.get_stats()["active"] == 0
@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from services.request_coalescer import RequestCoalescer, normalize_query
+
+def test_normalize_query_ignores_case_spacing_and_trailing_punctuation():
+    assert normalize_query("  What is   RAG?! ") == normalize_query("what is rag")
+
+def test_concurrent_identical_requests_share_one_computation():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(coalescer.run("q", compute) for _ in range(5)))
+        return coalescer, calls, results
+
+    coalescer, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["answer"] * 5
+    assert coalescer.coalesced_requests == 4
+    assert coalescer.get_stats()["in_flight"] == 0
+
+def test_leader_failure_reaches_followers():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("backend down")
+
+        return await asyncio.gather(*(coalescer.run("q", compute) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return f"answer {calls}"
+
+        leader = asyncio.create_task(coalescer.run("q", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.run("q", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        result = await follower
+        return calls, result
+
+    calls, result = asyncio.run(scenario())
+    # The follower is not cancelled with the leader, it runs the computation itself
+    assert calls == 2
+    assert result == "answer 2"
+
+def test_cancelled_follower_leaves_leader_running():
+    async def scenario():
+        coalescer = RequestCoalescer("test")
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        leader = asyncio.create_task(coalescer.run("q", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.run("q", compute))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+        return await leader
+
+    assert asyncio.run(scenario()) == "answer"
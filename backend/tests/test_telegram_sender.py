@@ -0,0 +1,53 @@
+import httpx
+import pytest
+from services.telegram_sender import TokenBucket, split_message, retry_after_seconds
+
+def test_short_message_is_not_split():
+    assert split_message("hello") == ["hello"]
+    assert split_message("") == []
+
+def test_split_prefers_paragraph_breaks():
+    text = "a" * 60 + "\n\n" + "b" * 20 + "\n" + "c" * 30
+    assert split_message(text, limit=100) == ["a" * 60, "b" * 20 + "\n" + "c" * 30]
+
+def test_split_falls_back_to_words_then_hard_cuts():
+    words = " ".join(["word"] * 50)
+    chunks = split_message(words, limit=32)
+    assert all(len(chunk) <= 32 for chunk in chunks)
+    assert " ".join(chunks) == words
+
+    assert split_message("x" * 250, limit=100) == ["x" * 100, "x" * 100, "x" * 50]
+
+def test_token_bucket_spends_capacity_then_reports_the_wait(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("services.telegram_sender.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=2.0, capacity=2)
+
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    now[0] += 0.5
+    assert bucket.try_acquire() == 0.0
+    assert not bucket.is_full
+    now[0] += 1.0
+    assert bucket.is_full
+
+def test_paused_bucket_hands_out_no_tokens(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("services.telegram_sender.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=1.0, capacity=5)
+
+    bucket.pause(3)
+    assert bucket.try_acquire() == pytest.approx(3)
+    assert not bucket.is_full
+    now[0] += 3
+    assert bucket.try_acquire() == 0.0
+
+def test_retry_after_from_body_header_or_default():
+    body = httpx.Response(429, json={"ok": False, "parameters": {"retry_after": 7}})
+    header = httpx.Response(429, text="<html>Too Many Requests</html>", headers={"Retry-After": "4"})
+    neither = httpx.Response(429, text="slow down")
+
+    assert retry_after_seconds(body) == 7.0
+    assert retry_after_seconds(header) == 4.0
+    assert retry_after_seconds(neither) == 1.0
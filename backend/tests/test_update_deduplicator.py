@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from services.update_deduplicator import UpdateDeduplicator
+
+@pytest.mark.parametrize("mode", ["key", "bitmap"])
+def test_check_many_marks_each_update_once(fake_redis, mode):
+    async def scenario():
+        deduplicator = UpdateDeduplicator(mode=mode)
+        first = await deduplicator.check_many([10, 11, 10])
+        second = await deduplicator.check_many([11, 12])
+        single = await deduplicator.is_duplicate(12)
+        return deduplicator, first, second, single
+
+    deduplicator, first, second, single = asyncio.run(scenario())
+    # A repeat inside one batch counts as a duplicate of its first occurrence
+    assert first == [False, False, True]
+    assert second == [True, False]
+    assert single is True
+    assert deduplicator.get_stats()["duplicates"] == 3
+
+def test_bitmap_mode_keys_ids_by_window(fake_redis):
+    async def scenario():
+        deduplicator = UpdateDeduplicator(mode="bitmap", ttl=60)
+        window = UpdateDeduplicator.BITMAP_WINDOW
+        await deduplicator.check_many([5, window + 5])
+        client = await fake_redis()
+        return (
+            await client.getbit("telegram:updates:0", 5),
+            await client.getbit("telegram:updates:1", 5),
+            await client.ttl("telegram:updates:1")
+        )
+
+    first_window, second_window, ttl = asyncio.run(scenario())
+    assert first_window == 1
+    assert second_window == 1
+    assert 0 < ttl <= 60
+
+def test_check_many_fails_open_when_redis_is_down(monkeypatch):
+    import services.update_deduplicator as update_deduplicator
+
+    async def unavailable():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(update_deduplicator, "get_redis_client", unavailable)
+    assert asyncio.run(UpdateDeduplicator().check_many([1, 2])) == [False, False]
@@ -5,12 +5,36 @@ class Settings(BaseSettings):
     # Telegram
     TELEGRAM_BOT_TOKEN: str = ""
     TELEGRAM_WEBHOOK_URL: Optional[str] = None
+    TELEGRAM_API_BASE_URL: str = "https://api.telegram.org"
+    TELEGRAM_INGESTION_MODE: str = "webhook"  # or "polling"
+    TELEGRAM_POLL_TIMEOUT: int = 50
+    TELEGRAM_POLL_BATCH_SIZE: int = 100
+    TELEGRAM_DEDUP_MODE: str = "key"  # or "bitmap" for high update rates
+    TELEGRAM_DEDUP_TTL: int = 3600
+    TELEGRAM_GLOBAL_RATE_LIMIT: float = 30.0
+    TELEGRAM_PER_CHAT_RATE_LIMIT: float = 1.0
+    TELEGRAM_PER_CHAT_BURST: int = 3
+    TELEGRAM_SEND_QUEUE_SIZE: int = 10000
+    TELEGRAM_SEND_WORKERS: int = 8
+    TELEGRAM_SEND_MAX_RETRIES: int = 3
+    TELEGRAM_SEND_ENQUEUE_TIMEOUT: float = 5.0  # how long a reply waits for room in a full send queue
     
     # Redis
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: int = 0
+    REDIS_MAX_CONNECTIONS: int = 50  # per pool (decoded and raw)
+    REDIS_POOL_TIMEOUT: float = 5.0
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    REDIS_RETRY_ATTEMPTS: int = 3
+    REDIS_RETRY_BACKOFF_CAP: float = 1.0
+    CACHE_LOCAL_ENABLED: bool = True
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    CACHE_LOCAL_TTL: float = 30.0
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"
     
     # Milvus
     MILVUS_HOST: str = "localhost"
@@ -20,7 +44,17 @@ class Settings(BaseSettings):
     
     # LLM
     LLM_API_URL: str = ""
+    LLM_API_URLS: str = ""  # Comma-separated replicas, overrides LLM_API_URL
     LLM_API_KEY: Optional[str] = None
+    LLM_ROUTING_STRATEGY: str = "least_outstanding"  # or "ewma"
+    LLM_EJECTION_FAILURES: int = 3
+    LLM_EJECTION_SECONDS: float = 30.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_MAX_QUEUE_SIZE: int = 100
+    LLM_QUEUE_TIMEOUT: float = 10.0
+    LLM_BATCH_QUEUE_TIMEOUT: float = 120.0
     
     # Reranker
     RERANKER_API_URL: str = "https://api.jina.ai/v1/rerank"
@@ -33,8 +67,57 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     LOG_LEVEL: str = "INFO"
     MAX_CONVERSATION_HISTORY: int = 5
+    CONVERSATION_ENCODING: str = "msgpack"  # "msgpack" or "json"
+    CONVERSATION_COMPRESS_THRESHOLD: int = 512
+    CONVERSATION_MEMORY_MODE: str = "window"  # "window" or "summary"
+    CONVERSATION_RECENT_TURNS: int = 4
+    CONVERSATION_SUMMARY_BATCH: int = 6
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = 300
+    CONVERSATION_PROMPT_TOKEN_BUDGET: int = 1500
     RAG_TOP_K: int = 10
     RAG_TOP_RERANK: int = 3
+    COALESCE_IDENTICAL_QUERIES: bool = True
+    DASHBOARD_CACHE_REFRESH_SECONDS: float = 15.0
+    DASHBOARD_CACHE_MAX_STALE_SECONDS: float = 300.0
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 256
+    DASHBOARD_PUSH_INTERVAL: float = 5.0
+    DASHBOARD_STREAM_HEARTBEAT: float = 15.0
+    DASHBOARD_EVENTS_CHANNEL: str = "dashboard:events"
+    CONVERSATION_FEED_MAXLEN: int = 10000
+    QUERY_LOG_MODE: str = "off"  # "off", "redis" or "file"
+    QUERY_LOG_SAMPLE_RATE: float = 0.01
+    QUERY_LOG_PATH: str = "logs/query_log.jsonl"
+    QUERY_LOG_MAXLEN: int = 100000
+    MESSAGE_DEADLINE_SECONDS: float = 25.0
+    SPECULATIVE_RETRIEVAL: bool = True
+    MESSAGE_WORKERS: int = 32
+    MESSAGE_QUEUE_SIZE: int = 2000
+    
+    # Latency sketches
+    LATENCY_SKETCH_ACCURACY: float = 0.01
+    LATENCY_SKETCH_BUCKET_SECONDS: int = 3600
+    
+    # Circuit breakers
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = 30.0
+    
+    # Health probes
+    HEALTH_PROBE_INTERVAL: float = 15.0
+    HEALTH_PROBE_TIMEOUT: float = 5.0
+    HEALTH_PROBE_SLOW_SECONDS: float = 2.0
+    HEALTH_PROBE_WINDOW: int = 240  # probes kept for availability, 1h at the default interval
+    
+    # Outbound HTTP
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP2_ENABLED: bool = False
+    TELEGRAM_HTTP_MAX_CONNECTIONS: int = 50
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    
+    # Auth
+    AUTH_HASH_CONCURRENCY: int = 4  # bcrypt calls running at once in the thread pool
+    AUTH_TOKEN_CACHE_SIZE: int = 1024
     
     # Scraping
     SCRAPING_DELAY: int = 1
@@ -101,6 +101,9 @@ const Dashboard: React.FC<DashboardProps> = ({ onLogout }) => {
 
   useEffect(() => {
     loadDashboardData();
+    return apiService.subscribeToDashboardEvents({
+      onMetrics: (changed) => setMetrics((current) => (current ? { ...current, ...changed } : current))
+    });
   }, []);
 
   const loadDashboardData = async () => {
@@ -43,8 +43,16 @@ const WebScraping: React.FC = () => {
 
   useEffect(() => {
     loadScrapingJobs();
-    const interval = setInterval(loadScrapingJobs, 5000); // Refresh every 5 seconds
-    return () => clearInterval(interval);
+    // Job progress is pushed by the server; reload the full list whenever the stream (re)connects
+    return apiService.subscribeToDashboardEvents({
+      onOpen: loadScrapingJobs,
+      onScrapingJob: (job: ScrapingJob) =>
+        setJobs((current) =>
+          current.some((existing) => existing.job_id === job.job_id)
+            ? current.map((existing) => (existing.job_id === job.job_id ? job : existing))
+            : [...current, job]
+        )
+    });
   }, []);
 
   const loadScrapingJobs = async () => {
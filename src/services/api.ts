@@ -4,25 +4,33 @@ export interface DashboardMetrics {
   active_users: number;
   messages_today: number;
   avg_response_time: number;
+  p50_response_time?: number;
+  p95_response_time?: number;
+  p99_response_time?: number;
   rag_accuracy: number;
   change_active_users: string;
   change_messages: string;
   change_response_time: string;
   change_accuracy: string;
+  data_age_seconds?: number;
 }
 
 export interface SystemStatus {
   service: string;
   status: 'healthy' | 'warning' | 'error';
   uptime: string;
+  latency_ms?: number | null;
+  last_checked?: string | null;
+  data_age_seconds?: number;
 }
 
 export interface Conversation {
-  id: number;
+  id: number | string;
   user: string;
   message: string;
   time: string;
-  status: 'resolved' | 'pending';
+  status: 'resolved' | 'pending' | 'failed';
+  latency_ms?: number;
 }
 
 export interface KnowledgeSource {
@@ -38,6 +46,14 @@ export interface ActivityData {
   messages: number;
   users: number;
   response_time: number;
+  data_age_seconds?: number;
+}
+
+export interface DashboardEventHandlers {
+  onMetrics?: (changed: Partial<DashboardMetrics>) => void;
+  onActivity?: (latest: ActivityData) => void;
+  onScrapingJob?: (job: any) => void;
+  onOpen?: () => void;
 }
 
 class ApiService {
@@ -71,14 +87,37 @@ class ApiService {
     return this.request<SystemStatus[]>('/dashboard/system-status');
   }
 
-  async getConversations(): Promise<Conversation[]> {
-    return this.request<Conversation[]>('/dashboard/conversations');
+  async getConversations(before?: string, limit: number = 20): Promise<Conversation[]> {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (before) {
+      params.set('before', before);
+    }
+    return this.request<Conversation[]>(`/dashboard/conversations?${params}`);
   }
 
   async getActivityData(): Promise<ActivityData[]> {
     return this.request<ActivityData[]>('/dashboard/activity');
   }
 
+  // Live updates over Server-Sent Events; returns a function that closes the stream
+  subscribeToDashboardEvents(handlers: DashboardEventHandlers): () => void {
+    const source = new EventSource(`${API_BASE_URL}/dashboard/stream`);
+    const listen = <T,>(event: string, handler?: (data: T) => void) => {
+      if (handler) {
+        source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+      }
+    };
+
+    listen('metrics', handlers.onMetrics);
+    listen('activity', handlers.onActivity);
+    listen('scraping_job', handlers.onScrapingJob);
+    if (handlers.onOpen) {
+      source.onopen = handlers.onOpen;
+    }
+
+    return () => source.close();
+  }
+
   // Knowledge base endpoints
   async getKnowledgeSources(): Promise<KnowledgeSource[]> {
     return this.request<KnowledgeSource[]>('/knowledge/sources');